@@ -0,0 +1,227 @@
+"""Benchmarks for the filter/aggregation hot paths on synthetic data.
+
+    python bench/bench_hotpaths.py --combos 5000 --output bench.json
+    python bench/bench_hotpaths.py --combos 5000 --compare bench.json
+"""
+import argparse
+import json
+import math
+import os
+import platform
+import random
+import statistics
+import sys
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from data_loader import SkillIndex  # noqa: E402
+from filter_engine import build_filter_engine  # noqa: E402
+from filters import (  # noqa: E402
+    NONE_TOKEN,
+    aggregated_results,
+    filter_combos,
+    get_levels_for_skill_in_slot,
+    options_per_position,
+    rarity_label_for_position,
+)
+from query import CharmQuery  # noqa: E402
+
+
+def make_dataset(
+    groups: int = 10,
+    rarities: int = 4,
+    combos_per_rarity: int = 1000,
+    slots: int = 3,
+    skills_per_group: int = 35,
+    skill_universe: int = 150,
+    empty_ratio: float = 0.1,
+    seed: int = 0,
+) -> Dict[str, Any]:
+    """Random data in the extracted_data.json schema."""
+    rng = random.Random(seed)
+    names = [f"Skill {i:04d}" for i in range(skill_universe)]
+    skills_data = {}
+    for g in range(1, groups + 1):
+        picked = rng.sample(names, min(skills_per_group, skill_universe))
+        skills_data[str(g)] = [{"skill_name": n, "skill_level": rng.randint(1, 3)} for n in picked]
+    patterns = [[[1, 1], [2, 0], [2, 1], [3, 0]], [[1, 0], [1, 1], [2, 0]], [["W1", 0], ["W1", 1]]]
+    rarity = {}
+    for r in range(rarities):
+        combos = []
+        for _ in range(combos_per_rarity):
+            comb = [rng.randint(1, groups) for _ in range(slots)]
+            for i in range(1, slots):
+                if rng.random() < empty_ratio:
+                    comb[i] = None
+            combos.append({"combination": comb, "slots_info": rng.choice(patterns)})
+        rarity[str(r + 5)] = combos
+    return {"rarity": rarity, "skills_data": skills_data}
+
+
+def make_selections(cq: CharmQuery, rarity: str, count: int, seed: int = 1) -> List[Dict[str, Any]]:
+    """Selections a user could actually make: each slot picked from a real combo."""
+    rng = random.Random(seed)
+    combos = cq.combos(rarity)
+    slots = cq.slot_count(rarity)
+    out = []
+    for _ in range(count):
+        comb = rng.choice(combos).combination
+        skills: List[Any] = []
+        levels: List[Any] = []
+        filled = rng.randint(0, slots)
+        for i in range(slots):
+            r = comb[i] if i < len(comb) else None
+            if i >= filled:
+                skills.append(None)
+            elif r is None:
+                skills.append(NONE_TOKEN)
+            else:
+                skills.append(rng.choice(sorted(cq.index.skill_names(r))))
+            levels.append(None)
+        search = rng.choice(["", "", "", "skill 00", "1"])
+        out.append({"skills": skills, "levels": levels, "search": search})
+    return out
+
+
+def bench(fn: Callable[[], Any], min_time: float = 0.2, min_rounds: int = 5, max_rounds: int = 200) -> Dict[str, float]:
+    """Time ``fn`` pytest-benchmark style: calibrate iterations per round, then collect rounds."""
+    iterations = 1
+    while True:
+        t0 = time.perf_counter()
+        for _ in range(iterations):
+            fn()
+        elapsed = time.perf_counter() - t0
+        if elapsed >= 0.01 or iterations >= 1 << 20:
+            break
+        iterations *= 2
+
+    samples: List[float] = []
+    deadline = time.perf_counter() + min_time
+    while len(samples) < min_rounds or (time.perf_counter() < deadline and len(samples) < max_rounds):
+        t0 = time.perf_counter()
+        for _ in range(iterations):
+            fn()
+        samples.append((time.perf_counter() - t0) / iterations)
+
+    samples.sort()
+    q1, _, q3 = statistics.quantiles(samples, n=4) if len(samples) > 1 else (samples[0],) * 3
+    mean = statistics.fmean(samples)
+    return {
+        "min": samples[0],
+        "max": samples[-1],
+        "mean": mean,
+        "stddev": statistics.stdev(samples) if len(samples) > 1 else 0.0,
+        "median": statistics.median(samples),
+        "iqr": q3 - q1,
+        "ops": 1.0 / mean if mean else math.inf,
+        "rounds": len(samples),
+        "iterations": iterations,
+    }
+
+
+def run_suite(params: Dict[str, Any], selections: int = 50) -> Dict[str, Dict[str, float]]:
+    data = make_dataset(**params)
+    cq = CharmQuery(data)
+    index = cq.index
+    rarity = cq.rarities()[0]
+    combos = cq.combos(rarity)
+    slots = cq.slot_count(rarity)
+    sels = make_selections(cq, rarity, selections)
+    engine = build_filter_engine(index, combos)
+    filtered = [filter_combos(index, combos, s["skills"], s["levels"], s["search"]) for s in sels]
+    full = next((s for s in sels if all(s["skills"])), sels[0])
+    full_filtered = filter_combos(index, combos, full["skills"], full["levels"], full["search"])
+
+    def cold_run(sel: Dict[str, Any]) -> Any:
+        # Without this every selection after the first round is a FilterState
+        # prefix hit plus a derived-cache hit, which hides the real work. The
+        # engine stays: building it is measured on its own above.
+        cq._states.pop(rarity, None)
+        cq.derived_cache.clear()
+        return cq.run(rarity, sel["skills"], sel["levels"], sel["search"])
+
+    def cycle(fn: Callable[[int], Any]) -> Callable[[], None]:
+        state = {"i": 0}
+
+        def step() -> None:
+            fn(state["i"] % len(sels))
+            state["i"] += 1
+        return step
+
+    cases: Dict[str, Callable[[], Any]] = {
+        "build_index": lambda: SkillIndex(data),
+        "build_filter_engine": lambda: build_filter_engine(index, combos),
+        "filter_combos": cycle(lambda i: filter_combos(index, combos, sels[i]["skills"], sels[i]["levels"], sels[i]["search"])),
+        "engine_filter": cycle(lambda i: engine.filter(sels[i]["skills"], sels[i]["levels"], sels[i]["search"])),
+        "options_per_position": cycle(lambda i: options_per_position(index, filtered[i], slots)),
+        "get_levels_for_skill_in_slot": cycle(
+            lambda i: [get_levels_for_skill_in_slot(index, filtered[i], p, s) for p, s in enumerate(sels[i]["skills"]) if s]
+        ),
+        "rarity_label_for_position": lambda: [rarity_label_for_position(combos, p) for p in range(slots)],
+        "aggregated_results": lambda: aggregated_results(index, full_filtered, full["skills"]),
+        "refresh_all": cycle(lambda i: cold_run(sels[i])),
+        "refresh_all_cached": cycle(lambda i: cq.run(rarity, sels[i]["skills"], sels[i]["levels"], sels[i]["search"])),
+    }
+    return {name: bench(fn) for name, fn in cases.items()}
+
+
+def compare(report: Dict[str, Any], baseline: Dict[str, Any], threshold: float) -> int:
+    regressions = 0
+    print(f"{'benchmark':32} {'baseline':>12} {'current':>12} {'ratio':>8}")
+    for name, stats in report["results"].items():
+        old = baseline.get("results", {}).get(name)
+        if not old:
+            print(f"{name:32} {'-':>12} {stats['median'] * 1e6:>10.1f}us {'new':>8}")
+            continue
+        ratio = stats["median"] / old["median"] if old["median"] else math.inf
+        flag = "  REGRESSION" if ratio > 1 + threshold else ""
+        regressions += bool(flag)
+        print(f"{name:32} {old['median'] * 1e6:>10.1f}us {stats['median'] * 1e6:>10.1f}us {ratio:>7.2f}x{flag}")
+    return regressions
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--groups", type=int, default=10, help="rarity groups (skill tables)")
+    parser.add_argument("--rarities", type=int, default=4)
+    parser.add_argument("--combos", type=int, default=1000, help="combos per rarity")
+    parser.add_argument("--slots", type=int, default=3)
+    parser.add_argument("--skills", type=int, default=35, help="skills per rarity group")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="write the JSON report here")
+    parser.add_argument("--compare", help="baseline JSON report to compare against")
+    parser.add_argument("--threshold", type=float, default=0.10, help="allowed median slowdown before flagging")
+    args = parser.parse_args(argv)
+
+    params = {
+        "groups": args.groups,
+        "rarities": args.rarities,
+        "combos_per_rarity": args.combos,
+        "slots": args.slots,
+        "skills_per_group": args.skills,
+        "seed": args.seed,
+    }
+    report = {
+        "params": params,
+        "machine": {"python": platform.python_version(), "platform": platform.platform(), "cpus": os.cpu_count()},
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "results": run_suite(params),
+    }
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            return 1 if compare(report, json.load(f), args.threshold) else 0
+
+    print(f"{'benchmark':32} {'median':>12} {'mean':>12} {'stddev':>12} {'rounds':>7}")
+    for name, s in report["results"].items():
+        print(f"{name:32} {s['median'] * 1e6:>10.1f}us {s['mean'] * 1e6:>10.1f}us {s['stddev'] * 1e6:>10.1f}us {s['rounds']:>7}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,10 +1,29 @@
 import openpyxl
+import argparse
+import os
 import re
 import json
+import sys
+import tempfile
 
-def parse_combinations_data(sheet):
-    data = {}
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+from compact_data import write_compact_items
+from paths import replace_atomically
+from reload import file_sha256
+
+WORKBOOK_PATH = "data/amulettable.xlsx"
+JSON_OUT = "src/extracted_data.json"
+COMPACT_OUT = "src/extracted_data.bin"
+
+
+def _cells(row, width):
+    row = tuple(row)
+    return row + (None,) * (width - len(row))
+
+
+def iter_combinations(sheet):
     for row in sheet.iter_rows(min_row=2, values_only=True):
+        row = _cells(row, 5)
         if not row[0] or not str(row[0]).strip():
             continue
 
@@ -24,25 +43,22 @@ def parse_combinations_data(sheet):
         ]
         
         secondary_data = []
-        if len(row) > 4 and row[4]:
+        if row[4]:
             secondary_data_str = str(row[4]).strip()
             sub_matches = re.findall(r"\[([^\[\]]+)\]", secondary_data_str)
             for m in sub_matches:
                 parts = [p.strip() for p in m.split(',')]
                 secondary_data.append([int(p) if p.isdigit() else p for p in parts])
 
-        if rare_group not in data:
-            data[rare_group] = []
-        
-        data[rare_group].append({
+        yield rare_group, {
             "combination": combination,
             "slots_info": secondary_data
-        })
-    return data
+        }
 
-def parse_skills_data(sheet):
-    data = {}
+
+def iter_skills(sheet):
     for row in sheet.iter_rows(min_row=3, values_only=True):
+        row = tuple(row)
         if len(row) < 4 or not row[1]:
             continue
         
@@ -50,51 +66,125 @@ def parse_skills_data(sheet):
             group = int(row[1])
             skill_name = str(row[2]).strip()
             skill_level = int(row[3])
-
-            if group not in data:
-                data[group] = []
-            
-            data[group].append({
-                "skill_name": skill_name,
-                "skill_level": skill_level
-            })
         except (ValueError, IndexError):
             print(f"Skipping row with invalid data: {row}")
             continue
-            
-    return data
+
+        yield group, {
+            "skill_name": skill_name,
+            "skill_level": skill_level
+        }
+
+
+class GroupSpool:
+    """Spills ``(group, record)`` pairs to one temp file per group as they stream in.
+
+    Rows of a group don't have to be contiguous in the sheet, and only one
+    group's records are ever held in memory when reading them back.
+    """
+
+    def __init__(self):
+        self._files = {}
+
+    def add_all(self, pairs):
+        for group, record in pairs:
+            f = self._files.get(group)
+            if f is None:
+                f = tempfile.TemporaryFile("w+", encoding="utf-8")
+                self._files[group] = f
+            f.write(json.dumps(record, ensure_ascii=False))
+            f.write("\n")
+        return self
+
+    def groups(self):
+        return list(self._files)
+
+    def lines(self, group):
+        f = self._files[group]
+        f.seek(0)
+        for line in f:
+            yield line.rstrip("\n")
+
+    def items(self):
+        for group in self.groups():
+            yield group, [json.loads(line) for line in self.lines(group)]
+
+    def close(self):
+        for f in self._files.values():
+            f.close()
+        self._files = {}
+
+
+def write_json_stream(out, sections):
+    out.write("{")
+    for s_idx, (section, spool) in enumerate(sections):
+        out.write(",\n" if s_idx else "\n")
+        out.write(f"  {json.dumps(section)}: {{")
+        for g_idx, group in enumerate(spool.groups()):
+            out.write(",\n" if g_idx else "\n")
+            out.write(f"    {json.dumps(str(group))}: [")
+            for r_idx, line in enumerate(spool.lines(group)):
+                out.write(",\n      " if r_idx else "\n      ")
+                out.write(line)
+            out.write("\n    ]")
+        out.write("\n  }")
+    out.write("\n}\n")
+
 
 def main():
-    file_path = "data/amulettable.xlsx"
-    
+    parser = argparse.ArgumentParser(description="Extract the amulet tables into src/extracted_data.json/.bin")
+    parser.add_argument("--force", action="store_true", help="extract even if the workbook is unchanged")
+    args = parser.parse_args()
+
+    file_path = WORKBOOK_PATH
+    stamp_path = file_path + ".sha256"
+
     try:
-        workbook = openpyxl.load_workbook(file_path)
+        digest = file_sha256(file_path)
     except FileNotFoundError:
         print(f"Error: The file '{file_path}' was not found. Please ensure it's in the same directory as the script.")
         return
 
+    if not args.force and os.path.exists(JSON_OUT) and os.path.exists(COMPACT_OUT) and os.path.exists(stamp_path):
+        with open(stamp_path, "r", encoding="utf-8") as f:
+            if f.read().strip() == digest:
+                print(f"'{file_path}' is unchanged since the last extraction; nothing to do (use --force to redo it).")
+                return
+
+    workbook = openpyxl.load_workbook(file_path, read_only=True, data_only=True)
+    combinations = GroupSpool()
+    skills = GroupSpool()
     try:
-        combinations_sheet = workbook.worksheets[0]
-        skills_sheet = workbook.worksheets[2]
-    except IndexError:
-        print("Error: The workbook does not contain enough sheets. Please ensure there is at least a first and third sheet.")
-        return
+        try:
+            combinations_sheet = workbook.worksheets[0]
+            skills_sheet = workbook.worksheets[2]
+        except IndexError:
+            print("Error: The workbook does not contain enough sheets. Please ensure there is at least a first and third sheet.")
+            return
+
+        print("Parsing rarity combinations data...")
+        combinations.add_all(iter_combinations(combinations_sheet))
+
+        print("Parsing skills data...")
+        skills.add_all(iter_skills(skills_sheet))
 
-    print("Parsing rarity combinations data...")
-    combinations_data = parse_combinations_data(combinations_sheet)
+        def write_json(path):
+            with open(path, "w", encoding="utf-8") as f:
+                write_json_stream(f, [("rarity", combinations), ("skills_data", skills)])
 
-    print("Parsing skills data...")
-    skills_data = parse_skills_data(skills_sheet)
+        replace_atomically(JSON_OUT, write_json)
+        replace_atomically(COMPACT_OUT, lambda path: write_compact_items(
+            combinations.items(), skills.items(), path
+        ))
+    finally:
+        workbook.close()
+        combinations.close()
+        skills.close()
 
-    final_data = {
-        "rarity": combinations_data,
-        "skills_data": skills_data
-    }
+    with open(stamp_path, "w", encoding="utf-8") as f:
+        f.write(digest + "\n")
 
-    with open("src/extracted_data.json", "w", encoding="utf-8") as f:
-        json.dump(final_data, f, indent=2, ensure_ascii=False)
-    
-    print("Data successfully extracted and saved to 'extracted_data.json'.")
+    print(f"Data successfully extracted and saved to '{JSON_OUT}' and '{COMPACT_OUT}'.")
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,98 @@
+import itertools
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from filters import NONE_TOKEN
+from query import CharmQuery, evaluate
+from records import json_line
+
+_worker_query: Optional[CharmQuery] = None
+
+
+def _init_worker(data_path: str) -> None:
+    # Each worker loads and indexes the data once; tasks then only carry queries.
+    global _worker_query
+    _worker_query = CharmQuery.from_path(data_path)
+
+
+def _run_chunk(chunk: List[Tuple[int, Dict[str, Any]]]) -> Tuple[int, str]:
+    # Serialize here: sending result dicts back would leave the unpickling and
+    # json.dumps of every result to the single parent process.
+    return len(chunk), "".join(json_line(evaluate(_worker_query, q)) for _, q in chunk)
+
+
+def _chunks(queries: Iterable[Dict[str, Any]], size: int) -> Iterator[List[Tuple[int, Dict[str, Any]]]]:
+    it = enumerate(queries)
+    while True:
+        chunk = list(itertools.islice(it, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def selection_tuples(cq: CharmQuery, rarity: Any) -> Iterator[Tuple[Any, ...]]:
+    """Every distinct full skill selection (one skill per slot) a rarity can produce."""
+    seen = set()
+    slots = cq.slot_count(rarity)
+    for c in cq.combos(rarity):
+        combo = list(c.combination) + [None] * slots
+        per_slot = [
+            list(cq.index.skill_names(r)) if r is not None else [None]
+            for r in combo[:slots]
+        ]
+        for sel in itertools.product(*per_slot):
+            if sel not in seen:
+                seen.add(sel)
+                yield sel
+
+
+def selection_queries(cq: CharmQuery, rarity: Any) -> Iterator[Dict[str, Any]]:
+    for sel in selection_tuples(cq, rarity):
+        yield {"rarity": str(rarity), "skills": [NONE_TOKEN if s is None else s for s in sel]}
+
+
+def run_batch(
+    data_path: str,
+    queries: Iterable[Dict[str, Any]],
+    workers: Optional[int] = None,
+    chunk_size: int = 64,
+    ordered: bool = True,
+    max_pending: Optional[int] = None,
+) -> Iterator[str]:
+    """Evaluate ``queries`` on a process pool and yield the results as JSON lines.
+
+    Work is sent in chunks of ``chunk_size`` queries and at most
+    ``max_pending`` chunks are in flight, so ``queries`` may be a lazy,
+    unbounded iterator. Each yielded string holds one chunk's results, one
+    JSON line per query. With ``ordered`` the chunks come back in input
+    order; otherwise in completion order.
+    """
+    workers = workers or os.cpu_count() or 1
+    max_pending = max_pending or workers * 4
+    chunks = _chunks(queries, chunk_size)
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(data_path,)) as pool:
+        pending = {}
+        for chunk in itertools.islice(chunks, max_pending):
+            pending[pool.submit(_run_chunk, chunk)] = chunk[0][0]
+
+        if ordered:
+            by_start = {start: fut for fut, start in pending.items()}
+            next_seq = 0
+            while by_start:
+                fut = by_start.pop(next_seq)
+                count, lines = fut.result()
+                yield lines
+                next_seq += count
+                nxt = next(chunks, None)
+                if nxt is not None:
+                    by_start[nxt[0][0]] = pool.submit(_run_chunk, nxt)
+        else:
+            while pending:
+                fut = next(as_completed(pending))
+                del pending[fut]
+                yield fut.result()[1]
+                nxt = next(chunks, None)
+                if nxt is not None:
+                    pending[pool.submit(_run_chunk, nxt)] = nxt[0][0]
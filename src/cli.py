@@ -0,0 +1,137 @@
+import argparse
+import json
+import sys
+from typing import Any, Dict, IO, Iterable, Iterator, List, Optional
+
+from export import FORMATS, export_skill_names, export_to_path, format_for_path, iter_records, write_records
+from paths import data_file_path
+from query import CharmQuery, evaluate, normalize_selection
+from records import json_line
+
+
+def parse_queries(lines: Iterable[str]) -> Iterator[Dict[str, Any]]:
+    """Parse one JSON query object per line.
+
+    Query keys:
+
+    - ``rarity``: a rarity such as ``"5"``, or ``"*"`` for all of them (each
+      result then carries its ``rarity`` and ``by_rarity`` groups the
+      ``count``, ``combos`` and ``results`` per rarity).
+    - ``skills`` / ``levels``: lists with one entry per slot; ``null`` leaves
+      a slot unselected, ``"__NONE__"`` asks for an empty slot.
+    - ``search``: global search term.
+    - ``slots``: decoration slot pattern, e.g. ``"2,1"``, ``[2, 1]`` or ``"W1"``.
+    - ``optimize`` / ``top``: ``{"Skill": 2}`` targets and how many of the best
+      combos to return instead of a filter result; ``rarity`` is optional here.
+    - ``id``: echoed back in the result.
+
+    A bad line becomes a ``parse_error`` record so the stream goes on.
+    """
+    for lineno, line in enumerate(lines, start=1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            q = json.loads(line)
+            if not isinstance(q, dict):
+                raise ValueError("query must be a JSON object")
+        except ValueError as e:
+            yield {"line": lineno, "parse_error": f"{type(e).__name__}: {e}"}
+            continue
+        yield q
+
+
+def run_queries(cq: CharmQuery, queries: Iterable[Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+    for q in queries:
+        yield evaluate(cq, q)
+
+
+def write_jsonl(results: Iterable[Dict[str, Any]], out: IO[str]) -> None:
+    write_lines((json_line(res) for res in results), out)
+
+
+def write_lines(lines: Iterable[str], out: IO[str]) -> None:
+    for text in lines:
+        out.write(text)
+        out.flush()
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="charmchecker query",
+        description="Read charm queries as JSON lines on stdin and write results as JSON lines to stdout.",
+    )
+    parser.add_argument("--data", default=None, help="data file (.json or compact .bin); defaults to the bundled one")
+    parser.add_argument("--workers", type=int, default=0, help="evaluate on a process pool with this many workers")
+    parser.add_argument("--chunk-size", type=int, default=64, help="queries per task sent to a worker")
+    parser.add_argument("--unordered", action="store_true", help="emit pool results as they finish")
+    parser.add_argument("--all-selections", metavar="RARITY", default=None,
+                        help="instead of reading stdin, query every full skill selection of RARITY")
+    args = parser.parse_args(argv)
+
+    data_path = args.data or data_file_path()
+    if args.all_selections is not None:
+        from batch import selection_queries
+        queries: Iterable[Dict[str, Any]] = selection_queries(CharmQuery.from_path(data_path), args.all_selections)
+    else:
+        queries = parse_queries(sys.stdin)
+
+    if args.workers > 0:
+        from batch import run_batch
+        write_lines(run_batch(data_path, queries, workers=args.workers,
+                              chunk_size=args.chunk_size, ordered=not args.unordered), sys.stdout)
+    else:
+        write_jsonl(run_queries(CharmQuery.from_path(data_path), queries), sys.stdout)
+    return 0
+
+
+def export_main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="charmchecker export",
+        description="Stream every combo matching one query (a JSON object as read by `query`) to CSV or JSON lines.",
+    )
+    parser.add_argument("--data", default=None, help="data file (.json or compact .bin); defaults to the bundled one")
+    parser.add_argument("--query", default=None, help="the query as JSON; read from the first stdin line when omitted")
+    parser.add_argument("--output", "-o", default="-", help="file to write, or - for stdout (the default)")
+    parser.add_argument("--format", choices=FORMATS, default=None,
+                        help="output format; guessed from the --output extension, csv for stdout")
+    parser.add_argument("--progress", action="store_true", help="report rows written on stderr")
+    args = parser.parse_args(argv)
+
+    try:
+        q = json.loads(args.query if args.query is not None else sys.stdin.readline())
+    except ValueError as e:
+        parser.error(f"query is not valid JSON: {e}")
+    if not isinstance(q, dict) or "rarity" not in q:
+        parser.error('query must be a JSON object with a "rarity"')
+
+    cq = CharmQuery.from_path(args.data or data_file_path())
+    rarity = q["rarity"]
+    try:
+        positions = cq.slot_count(rarity)
+        skills = normalize_selection(q.get("skills"), positions)
+        combos = cq.filter(rarity, skills, q.get("levels"), q.get("search", ""), q.get("slots"))
+    except ValueError as e:
+        parser.error(str(e))
+    records = iter_records(cq.index, combos, skills, cq.rarity_of(rarity))
+    skill_names = export_skill_names(skills)
+
+    def report(written: int) -> None:
+        print(f"{written}/{len(combos)} rows", file=sys.stderr)
+
+    progress = report if args.progress else None
+
+    try:
+        if args.output == "-":
+            write_records(records, sys.stdout, args.format or "csv", positions, skill_names, progress)
+        else:
+            fmt = args.format or format_for_path(args.output)
+            export_to_path(args.output, records, fmt, positions, skill_names, progress)
+    except KeyboardInterrupt:
+        # export_to_path has already removed its partial file
+        return 130
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,167 @@
+import json
+import mmap
+import sys
+from array import array
+from typing import Any, Dict, Iterable, List, Tuple
+
+from records import Combo, SlotsInterner, make_combo
+
+MAGIC = b"CHRMDAT1"
+EMPTY_SLOT = -1
+_ALIGN = 8
+
+
+def _pad(n: int) -> int:
+    return (-n) % _ALIGN
+
+
+def write_compact(data_obj: Dict[str, Any], path: str) -> None:
+    """Write ``data_obj`` (the extracted_data.json schema) as a compact binary file.
+
+    Layout: MAGIC, a little header (u32 length + JSON) holding the interned
+    skill names, skills per group and the distinct ``slots_info`` patterns,
+    then per rarity an int16 combination column (rows x slots, -1 = empty)
+    and a uint16 column of pattern ids.
+    """
+    write_compact_items(
+        (data_obj.get("rarity") or {}).items(), (data_obj.get("skills_data") or {}).items(), path
+    )
+
+
+def write_compact_items(
+    rarity_items: Iterable[Tuple[Any, List[Any]]],
+    skills_items: Iterable[Tuple[Any, List[Dict[str, Any]]]],
+    path: str,
+) -> None:
+    """``write_compact`` from ``(rarity, combos)`` and ``(group, skills)`` pairs.
+
+    Each side is consumed once, so the pairs can come from a generator that
+    reads one group at a time.
+    """
+    names: List[str] = []
+    name_ids: Dict[str, int] = {}
+    skills: Dict[str, List[List[int]]] = {}
+    for group, entries in skills_items:
+        rows = []
+        for s in entries:
+            name = s.get("skill_name")
+            if name not in name_ids:
+                name_ids[name] = len(names)
+                names.append(name)
+            rows.append([name_ids[name], int(s.get("skill_level", 0))])
+        skills[str(group)] = rows
+
+    intern = SlotsInterner()
+    patterns: List[Any] = []
+    pattern_ids: Dict[Any, int] = {}
+    columns: List[Tuple[array, array]] = []
+    rarity_meta: Dict[str, Dict[str, int]] = {}
+    for key, combos in rarity_items:
+        combos = [make_combo(c, intern) for c in combos]
+        slots = max((len(c.combination) for c in combos), default=0)
+        comb_col = array("h")
+        pat_col = array("H")
+        for c in combos:
+            comb = list(c.combination)
+            comb += [None] * (slots - len(comb))
+            comb_col.extend(EMPTY_SLOT if r is None else int(r) for r in comb)
+            if c.slots_info not in pattern_ids:
+                pattern_ids[c.slots_info] = len(patterns)
+                patterns.append(c.slots_info)
+            pat_col.append(pattern_ids[c.slots_info])
+        rarity_meta[str(key)] = {"count": len(combos), "slots": slots}
+        columns.append((comb_col, pat_col))
+
+    offset = 0
+    for meta, (comb_col, pat_col) in zip(rarity_meta.values(), columns):
+        meta["combos_offset"] = offset
+        offset += len(comb_col) * comb_col.itemsize
+        offset += _pad(offset)
+        meta["patterns_offset"] = offset
+        offset += len(pat_col) * pat_col.itemsize
+        offset += _pad(offset)
+
+    header = json.dumps({
+        "byteorder": sys.byteorder,
+        "names": names,
+        "skills": skills,
+        "patterns": patterns,
+        "rarity": rarity_meta,
+    }, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+    with open(path, "wb") as f:
+        f.write(MAGIC)
+        f.write(len(header).to_bytes(4, "little"))
+        f.write(header)
+        f.write(b"\0" * _pad(len(MAGIC) + 4 + len(header)))
+        for comb_col, pat_col in columns:
+            for col in (comb_col, pat_col):
+                raw = col.tobytes()
+                f.write(raw)
+                f.write(b"\0" * _pad(len(raw)))
+
+
+def _column(buf: memoryview, start: int, typecode: str, length: int, swap: bool) -> array:
+    # Copied out of the map so nothing refers to it once loading is done.
+    col = array(typecode)
+    with buf[start:start + length * col.itemsize] as raw:
+        col.frombytes(raw)
+    if swap:
+        col.byteswap()
+    return col
+
+
+def _decode_rarities(buf: memoryview, base: int, meta: Dict[str, Dict[str, int]],
+                     patterns: List[Any], swap: bool) -> Dict[str, List[Combo]]:
+    intern = SlotsInterner()
+    patterns = [intern(p) for p in patterns]
+    out: Dict[str, List[Combo]] = {}
+    for key, m in meta.items():
+        count, slots = m["count"], m["slots"]
+        comb_col = _column(buf, base + m["combos_offset"], "h", count * slots, swap)
+        pat_col = _column(buf, base + m["patterns_offset"], "H", count, swap)
+        combos = []
+        for row in range(count):
+            cells = comb_col[row * slots:(row + 1) * slots]
+            combos.append(Combo(
+                tuple(None if r == EMPTY_SLOT else r for r in cells),
+                patterns[pat_col[row]],
+            ))
+        out[key] = combos
+    return out
+
+
+def load_compact(path: str) -> Dict[str, Any]:
+    """Read a compact file into records.
+
+    The file is mapped only while it is decoded; every rarity is decoded up
+    front (the query layer indexes all of them anyway) and the map is closed
+    before returning, so the file can be replaced while the app runs, which
+    Windows refuses for a file that is still mapped.
+    """
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        with memoryview(mm) as buf:
+            if bytes(buf[:len(MAGIC)]) != MAGIC:
+                raise ValueError(f"{path} is not a compact charm data file")
+            header_len = int.from_bytes(buf[len(MAGIC):len(MAGIC) + 4], "little")
+            header_end = len(MAGIC) + 4 + header_len
+            header = json.loads(bytes(buf[len(MAGIC) + 4:header_end]).decode("utf-8"))
+            rarity = _decode_rarities(
+                buf, header_end + _pad(header_end), header["rarity"], header["patterns"],
+                swap=header.get("byteorder", sys.byteorder) != sys.byteorder,
+            )
+
+    names = header["names"]
+    skills_data = {
+        group: [{"skill_name": names[n], "skill_level": lvl} for n, lvl in rows]
+        for group, rows in header["skills"].items()
+    }
+    return {"rarity": rarity, "skills_data": skills_data}
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 3:
+        print("usage: compact_data.py <extracted_data.json> <output.bin>")
+        sys.exit(2)
+    with open(sys.argv[1], "r", encoding="utf-8") as f:
+        write_compact(json.load(f), sys.argv[2])
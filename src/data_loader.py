@@ -1,5 +1,9 @@
 import json
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Set
+
+from compact_data import MAGIC, load_compact
+from records import to_records
+from search_index import SearchIndex
 
 
 def load_json(path: str) -> Dict[str, Any]:
@@ -7,6 +11,20 @@ def load_json(path: str) -> Dict[str, Any]:
         return json.load(f)
 
 
+def is_compact_file(path: str) -> bool:
+    try:
+        with open(path, "rb") as f:
+            return f.read(len(MAGIC)) == MAGIC
+    except OSError:
+        return False
+
+
+def load_data(path: str) -> Dict[str, Any]:
+    if is_compact_file(path):
+        return load_compact(path)
+    return to_records(load_json(path))
+
+
 def list_skill_names_for_rarity(data_obj: Dict[str, Any], rarity_key: str) -> List[str]:
     if not data_obj or "skills_data" not in data_obj:
         return []
@@ -25,4 +43,67 @@ def lookup_level(data_obj: Dict[str, Any], rarity_number: Any, skill_name: str)
     arr = [s for s in get_skills_for_rarity(data_obj, str(rarity_number)) if s.get("skill_name") == skill_name]
     if not arr:
         return 0
-    return max(int(s.get("skill_level", 0)) for s in arr)
\ No newline at end of file
+    return max(int(s.get("skill_level", 0)) for s in arr)
+
+
+def _group_key(key: Any) -> Any:
+    try:
+        return int(key)
+    except (TypeError, ValueError):
+        return key
+
+
+class SkillIndex:
+    """Hash-based view of ``skills_data`` built once per loaded dataset.
+
+    Rarity groups are keyed by int so the numbers stored in a combo's
+    ``combination`` can be used directly, without going through ``str()``.
+    """
+
+    def __init__(self, data_obj: Dict[str, Any]):
+        # rarity group -> skill name -> max level
+        self.max_levels: Dict[Any, Dict[str, int]] = {}
+        # rarity group -> skill name -> every level listed for it (as strings, like the UI uses)
+        self.levels: Dict[Any, Dict[str, Set[str]]] = {}
+        # rarity group -> lowercase skill names, for substring search
+        self.lower_names: Dict[Any, List[str]] = {}
+
+        skills_data = (data_obj or {}).get("skills_data", {}) or {}
+        for key, skills in skills_data.items():
+            group = _group_key(key)
+            max_levels: Dict[str, int] = {}
+            levels: Dict[str, Set[str]] = {}
+            for s in skills:
+                name = s.get("skill_name")
+                if not name:
+                    continue
+                lvl = s.get("skill_level", 0)
+                levels.setdefault(name, set()).add(str(lvl))
+                lvl_int = int(lvl or 0)
+                if name not in max_levels or lvl_int > max_levels[name]:
+                    max_levels[name] = lvl_int
+            self.max_levels[group] = max_levels
+            self.levels[group] = levels
+            self.lower_names[group] = [n.lower() for n in max_levels]
+        self.search = SearchIndex(self.lower_names)
+
+    def skill_names(self, rarity_number: Any) -> Dict[str, int]:
+        if rarity_number is None:
+            return {}
+        return self.max_levels.get(_group_key(rarity_number), {})
+
+    def has_skill(self, rarity_number: Any, skill_name: str) -> bool:
+        return skill_name in self.skill_names(rarity_number)
+
+    def has_level(self, rarity_number: Any, skill_name: str, level: Any) -> bool:
+        if rarity_number is None:
+            return False
+        return str(level) in self.levels.get(_group_key(rarity_number), {}).get(skill_name, ())
+
+    def levels_for(self, rarity_number: Any, skill_name: str) -> Set[str]:
+        if rarity_number is None:
+            return set()
+        return self.levels.get(_group_key(rarity_number), {}).get(skill_name, set())
+
+    def lookup_level(self, rarity_number: Any, skill_name: str) -> int:
+        return self.skill_names(rarity_number).get(skill_name, 0)
@@ -0,0 +1,131 @@
+import csv
+import json
+import os
+import threading
+from typing import IO, Any, Callable, Dict, Iterable, Iterator, List, Optional
+
+from data_loader import SkillIndex
+from filters import NONE_TOKEN, combo_totals, totals_available
+from paths import replace_atomically
+from records import Combo
+
+FORMATS = ("csv", "jsonl")
+PROGRESS_EVERY = 500
+
+
+class _Cancelled(Exception):
+    pass
+
+
+def format_for_path(path: str) -> str:
+    ext = os.path.splitext(path)[1].lower()
+    return "jsonl" if ext in (".jsonl", ".ndjson", ".json") else "csv"
+
+
+def export_skill_names(selected_skills: List[Any]) -> List[str]:
+    """Selected skills in slot order, each once: the totals columns of an export."""
+    names: List[str] = []
+    for sel in selected_skills:
+        if sel and sel != NONE_TOKEN and sel not in names:
+            names.append(sel)
+    return names
+
+
+def iter_records(
+    index: SkillIndex,
+    combos: List[Combo],
+    selected_skills: List[Any],
+    rarity_of: Callable[[Combo], str],
+) -> Iterator[Dict[str, Any]]:
+    """One export record per combo, built as it is consumed.
+
+    ``totals`` follows ``aggregated_results``: it is only filled in when every
+    used slot has a selection, and is empty otherwise.
+    """
+    with_totals = totals_available(combos, selected_skills)
+    for c in combos:
+        yield {
+            "rarity": rarity_of(c),
+            "combo": list(c.combination),
+            "slots_info": [list(layout) for layout in c.slots_info],
+            "totals": combo_totals(index, c, selected_skills) if with_totals else {},
+        }
+
+
+def _csv_rows(records: Iterable[Dict[str, Any]], positions: int, skill_names: List[str]) -> Iterator[List[Any]]:
+    yield ["rarity"] + [f"slot_{i + 1}" for i in range(positions)] + ["slots_info"] + skill_names
+    for rec in records:
+        combo = rec["combo"]
+        yield (
+            [rec["rarity"]]
+            + [combo[i] if i < len(combo) and combo[i] is not None else "" for i in range(positions)]
+            + [" | ".join("-".join(str(v) for v in layout) for layout in rec["slots_info"])]
+            + [rec["totals"].get(name, "") for name in skill_names]
+        )
+
+
+def write_records(
+    records: Iterable[Dict[str, Any]],
+    out: IO[str],
+    fmt: str,
+    positions: int,
+    skill_names: List[str],
+    progress: Optional[Callable[[int], None]] = None,
+    cancel: Optional[threading.Event] = None,
+) -> int:
+    """Stream ``records`` to ``out`` one row at a time and return how many were written.
+
+    ``progress`` gets the running count every ``PROGRESS_EVERY`` rows and at
+    the end; a set ``cancel`` event stops the export after the current row.
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"unknown export format {fmt!r}, expected one of {', '.join(FORMATS)}")
+    if fmt == "csv":
+        writer = csv.writer(out)
+        rows = _csv_rows(records, positions, skill_names)
+        writer.writerow(next(rows))
+        write = writer.writerow
+    else:
+        rows = iter(records)
+
+        def write(rec: Dict[str, Any]) -> None:
+            out.write(json.dumps(rec, ensure_ascii=False))
+            out.write("\n")
+
+    written = 0
+    for row in rows:
+        if cancel is not None and cancel.is_set():
+            break
+        write(row)
+        written += 1
+        if progress is not None and written % PROGRESS_EVERY == 0:
+            progress(written)
+    if progress is not None:
+        progress(written)
+    return written
+
+
+def export_to_path(
+    path: str,
+    records: Iterable[Dict[str, Any]],
+    fmt: str,
+    positions: int,
+    skill_names: List[str],
+    progress: Optional[Callable[[int], None]] = None,
+    cancel: Optional[threading.Event] = None,
+) -> int:
+    """``write_records`` into a temp file that replaces ``path`` only if the export finishes.
+
+    A cancelled or failed export leaves any existing file at ``path`` untouched.
+    """
+    def write(tmp: str) -> int:
+        with open(tmp, "w", encoding="utf-8", newline="") as out:
+            written = write_records(records, out, fmt, positions, skill_names, progress, cancel)
+        if cancel is not None and cancel.is_set():
+            raise _Cancelled(written)  # discard the partial file
+        return written
+
+    try:
+        return replace_atomically(path, write, suffix=".part")
+    except _Cancelled as e:
+        return e.args[0]
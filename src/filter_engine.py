@@ -0,0 +1,253 @@
+from typing import Any, Dict, List, Optional, Tuple
+
+from data_loader import SkillIndex
+from filters import NONE_TOKEN, SlotPattern, compute_max_slots, slots_info_matches
+from records import Combo
+
+
+def mask_indices(mask: int) -> List[int]:
+    bits = bin(mask)[:1:-1]
+    out: List[int] = []
+    i = bits.find("1")
+    while i != -1:
+        out.append(i)
+        i = bits.find("1", i + 1)
+    return out
+
+
+class FilterEngine:
+    """Compiled form of ``filters.filter_combos`` for one list of combos.
+
+    Every (slot, skill) and (slot, skill, level) pair gets an int bitmask over
+    the combos (bit i = combos[i]), so a selection is answered by AND-ing a
+    handful of masks instead of walking every combo. Slot patterns work the
+    same way over the (few, interned) distinct ``slots_info`` layouts.
+    """
+
+    def __init__(self, index: SkillIndex, combos: List[Combo]):
+        self.index = index
+        self.combos = combos
+        self.slots = compute_max_slots(combos)
+        self.all_mask = (1 << len(combos)) - 1
+
+        # slot -> rarity number (None for an empty slot) -> combos with it there
+        self.group_masks: List[Dict[Any, int]] = [{} for _ in range(self.slots)]
+        # rarity number -> combos using it in any slot
+        self.any_slot_masks: Dict[Any, int] = {}
+        for bit, c in enumerate(combos):
+            combo = c.combination
+            b = 1 << bit
+            for i in range(self.slots):
+                rnum = combo[i] if i < len(combo) else None
+                groups = self.group_masks[i]
+                groups[rnum] = groups.get(rnum, 0) | b
+                if rnum is not None:
+                    self.any_slot_masks[rnum] = self.any_slot_masks.get(rnum, 0) | b
+
+        # slots_info layout set -> combos offering it
+        self.slot_signature_masks: Dict[Any, int] = {}
+        for bit, c in enumerate(combos):
+            sig = c.slots_info
+            self.slot_signature_masks[sig] = self.slot_signature_masks.get(sig, 0) | (1 << bit)
+        self._pattern_masks: Dict[SlotPattern, int] = {}
+
+        self.skill_masks: List[Dict[str, int]] = [{} for _ in range(self.slots)]
+        self.level_masks: List[Dict[Tuple[str, str], int]] = [{} for _ in range(self.slots)]
+        for i, groups in enumerate(self.group_masks):
+            skills = self.skill_masks[i]
+            levels = self.level_masks[i]
+            for rnum, gmask in groups.items():
+                if rnum is None:
+                    continue
+                for name in index.skill_names(rnum):
+                    skills[name] = skills.get(name, 0) | gmask
+                    for lvl in index.levels_for(rnum, name):
+                        key = (name, lvl)
+                        levels[key] = levels.get(key, 0) | gmask
+
+    def search_mask(self, global_search: str) -> int:
+        sterm = (global_search or "").strip().lower()
+        if not sterm:
+            return self.all_mask
+        mask = 0
+        for rnum in self.index.search.groups_for(sterm):
+            mask |= self.any_slot_masks.get(rnum, 0)
+        return mask
+
+    def pattern_mask(self, slot_pattern: Optional[SlotPattern]) -> int:
+        if slot_pattern is None:
+            return self.all_mask
+        mask = self._pattern_masks.get(slot_pattern)
+        if mask is None:
+            mask = 0
+            for sig, smask in self.slot_signature_masks.items():
+                if slots_info_matches(sig, slot_pattern):
+                    mask |= smask
+            self._pattern_masks[slot_pattern] = mask
+        return mask
+
+    def slot_mask(self, slot_index: int, skill: Any, level: Any = None) -> int:
+        if not skill:
+            return self.all_mask
+        if slot_index >= self.slots:
+            return self.all_mask if skill == NONE_TOKEN else 0
+        if skill == NONE_TOKEN:
+            return self.group_masks[slot_index].get(None, 0)
+        if level:
+            return self.level_masks[slot_index].get((skill, str(level)), 0)
+        return self.skill_masks[slot_index].get(skill, 0)
+
+    def query_mask(
+        self,
+        selected_skills: List[Any],
+        selected_levels: List[Any],
+        global_search: str,
+        slot_pattern: Optional[SlotPattern] = None,
+    ) -> int:
+        mask = self.search_mask(global_search)
+        if slot_pattern is not None:
+            mask &= self.pattern_mask(slot_pattern)
+        for idx, sel in enumerate(selected_skills):
+            if not mask:
+                break
+            if not sel:
+                continue
+            sel_level = selected_levels[idx] if idx < len(selected_levels) else None
+            mask &= self.slot_mask(idx, sel, sel_level)
+        return mask
+
+    def select(self, mask: int) -> List[Combo]:
+        if mask == self.all_mask:
+            return list(self.combos)
+        combos = self.combos
+        return [combos[i] for i in mask_indices(mask)]
+
+    def filter(
+        self,
+        selected_skills: List[Any],
+        selected_levels: List[Any],
+        global_search: str,
+        slot_pattern: Optional[SlotPattern] = None,
+    ) -> List[Combo]:
+        return self.select(self.query_mask(selected_skills, selected_levels, global_search, slot_pattern))
+
+
+def build_filter_engine(index: SkillIndex, combos: Optional[List[Combo]]) -> FilterEngine:
+    return FilterEngine(index, combos or [])
+
+
+StageKey = Any
+
+
+class FilterState:
+    """Incremental front end for a ``FilterEngine``.
+
+    The query is treated as a chain of stages (global search, one stage per
+    slot, then the slot pattern) and the mask after every stage is kept. A
+    stage that only narrows (a slot gets a skill or a level, the search term
+    gets longer, a slot pattern is added) is
+    AND-ed into the masks already held; any other change restarts from the
+    last unchanged stage, reusing previously seen prefixes where possible.
+    """
+
+    MAX_PREFIXES = 512
+
+    def __init__(self, engine: FilterEngine):
+        self.engine = engine
+        self._keys: List[StageKey] = []
+        self._masks: List[int] = []
+        self._prefixes: Dict[Tuple[StageKey, ...], int] = {}
+
+    @staticmethod
+    def stage_keys(
+        selected_skills: List[Any],
+        selected_levels: List[Any],
+        global_search: str,
+        slot_pattern: Optional[SlotPattern] = None,
+    ) -> List[StageKey]:
+        keys: List[StageKey] = [(global_search or "").strip().lower()]
+        for idx, sel in enumerate(selected_skills):
+            if not sel:
+                keys.append(None)
+                continue
+            sel_level = selected_levels[idx] if idx < len(selected_levels) else None
+            keys.append((sel, str(sel_level) if sel_level and sel != NONE_TOKEN else None))
+        keys.append(slot_pattern)
+        return keys
+
+    def _stage_mask(self, stage: int, key: StageKey, last: int) -> int:
+        if stage == 0:
+            return self.engine.search_mask(key)
+        if stage == last:
+            return self.engine.pattern_mask(key)
+        if key is None:
+            return self.engine.all_mask
+        return self.engine.slot_mask(stage - 1, key[0], key[1])
+
+    @staticmethod
+    def _narrows(stage: int, old: StageKey, new: StageKey, last: int) -> bool:
+        if stage == 0:
+            return old in new
+        if old is None:
+            return True
+        if stage == last:
+            return False
+        return new is not None and old[0] == new[0] and old[1] is None
+
+    def _remember(self, keys: List[StageKey], masks: List[int]) -> None:
+        if len(self._prefixes) > self.MAX_PREFIXES:
+            self._prefixes.clear()
+        for j in range(len(keys)):
+            self._prefixes[tuple(keys[:j + 1])] = masks[j]
+
+    @property
+    def last_mask(self) -> int:
+        return self._masks[-1] if self._masks else self.engine.all_mask
+
+    def update(
+        self,
+        selected_skills: List[Any],
+        selected_levels: List[Any],
+        global_search: str,
+        slot_pattern: Optional[SlotPattern] = None,
+    ) -> int:
+        keys = self.stage_keys(selected_skills, selected_levels, global_search, slot_pattern)
+        last = len(keys) - 1
+        old_keys = self._keys
+        if len(keys) != len(old_keys):
+            first, changed = 0, list(range(len(keys)))
+        else:
+            changed = [j for j in range(len(keys)) if keys[j] != old_keys[j]]
+            if not changed:
+                return self._masks[-1]
+            first = changed[0]
+
+        masks = self._masks
+        if len(keys) == len(old_keys) and all(self._narrows(j, old_keys[j], keys[j], last) for j in changed):
+            for j in changed:
+                smask = self._stage_mask(j, keys[j], last)
+                for m in range(j, len(masks)):
+                    masks[m] &= smask
+        else:
+            masks = masks[:first]
+            prev = masks[-1] if masks else self.engine.all_mask
+            for j in range(first, len(keys)):
+                cached = self._prefixes.get(tuple(keys[:j + 1]))
+                if cached is None:
+                    cached = prev & self._stage_mask(j, keys[j], last) if prev else 0
+                masks.append(cached)
+                prev = cached
+
+        self._keys = keys
+        self._masks = masks
+        self._remember(keys, masks)
+        return masks[-1]
+
+    def filter(
+        self,
+        selected_skills: List[Any],
+        selected_levels: List[Any],
+        global_search: str,
+        slot_pattern: Optional[SlotPattern] = None,
+    ) -> List[Combo]:
+        return self.engine.select(self.update(selected_skills, selected_levels, global_search, slot_pattern))
@@ -1,50 +1,110 @@
-from typing import Any, Dict, List, Set, Tuple
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
 
-from data_loader import get_skills_for_rarity, list_skill_names_for_rarity, lookup_level
+from data_loader import SkillIndex
+from records import Combo
 
 
 NONE_TOKEN = "__NONE__"
 
+# (armor slot levels, weapon slot levels), each sorted high to low
+SlotPattern = Tuple[Tuple[int, ...], Tuple[int, ...]]
+
+
+def _split_slots(levels: Iterable[Any]) -> SlotPattern:
+    armor: List[int] = []
+    weapon: List[int] = []
+    for lvl in levels:
+        text = str(lvl).strip().upper()
+        if text.startswith("W"):
+            weapon.append(int(text[1:]))
+        elif text:
+            armor.append(int(text))
+    armor = [lvl for lvl in armor if lvl > 0]
+    weapon = [lvl for lvl in weapon if lvl > 0]
+    return tuple(sorted(armor, reverse=True)), tuple(sorted(weapon, reverse=True))
+
+
+def parse_slot_pattern(value: Any) -> Optional[SlotPattern]:
+    """Turn "3", "2,1", "W1 2" or [2, 1] into a SlotPattern; None/empty means no constraint.
+
+    A pattern asks for at least those decoration slots: [2, 1] is met by any
+    layout with two slots of which one is level 2 or more, e.g. [3, 1] or [2, 2].
+    Weapon slots ("W1") only count against weapon requirements.
+    """
+    if value is None:
+        return None
+    if isinstance(value, str):
+        levels = value.replace(",", " ").split()
+    elif isinstance(value, (list, tuple)):
+        levels = value
+    else:
+        levels = [value]
+    try:
+        pattern = _split_slots(levels)
+    except (TypeError, ValueError):
+        raise ValueError(f"bad slot pattern {value!r}, expected levels like \"2,1\" or \"W1 3\"") from None
+    return pattern if pattern[0] or pattern[1] else None
+
+
+def _covers(available: Tuple[int, ...], required: Tuple[int, ...]) -> bool:
+    # Both sorted high to low: the i-th largest slot must fit the i-th largest requirement.
+    return len(available) >= len(required) and all(a >= r for a, r in zip(available, required))
+
+
+def slots_info_matches(slots_info: Iterable[Iterable[Any]], pattern: Optional[SlotPattern]) -> bool:
+    """True if any of the combo's possible slot layouts satisfies ``pattern``."""
+    if pattern is None:
+        return True
+    for layout in slots_info:
+        armor, weapon = _split_slots(layout)
+        if _covers(armor, pattern[0]) and _covers(weapon, pattern[1]):
+            return True
+    return False
+
 
-def combos_for_rarity(data: Dict[str, Any], selected_rarity: str) -> List[Dict[str, Any]]:
+def combos_for_rarity(data: Dict[str, Any], selected_rarity: str) -> List[Combo]:
     if not data or not selected_rarity:
         return []
     return list((data.get("rarity", {}).get(str(selected_rarity), [])))
 
 
-def compute_max_slots(combos: List[Dict[str, Any]]) -> int:
+def compute_max_slots(combos: List[Combo]) -> int:
     max_len = 0
     for c in combos:
-        comb = c.get("combination", [])
+        comb = c.combination
         if len(comb) > max_len:
             max_len = len(comb)
     return max_len
 
 
 def filter_combos(
-    data: Dict[str, Any],
-    all_combos: List[Dict[str, Any]],
+    index: SkillIndex,
+    all_combos: List[Combo],
     selected_skills: List[Any],
     selected_levels: List[Any],
     global_search: str,
-) -> List[Dict[str, Any]]:
+    slot_pattern: Optional[SlotPattern] = None,
+) -> List[Combo]:
     if not all_combos:
         return []
     sterm = (global_search or "").strip().lower()
+    search_groups = index.search.groups_for(sterm) if sterm else frozenset()
+    # combos share interned slots_info tuples, so each layout set is checked once
+    pattern_hits: Dict[Any, bool] = {}
 
-    def combo_passes(c: Dict[str, Any]) -> bool:
-        combo = c.get("combination", [])
+    def combo_passes(c: Combo) -> bool:
+        combo = c.combination
 
         if sterm:
-            any_match = False
-            for rnum in combo:
-                if rnum is None: continue
-                for s in get_skills_for_rarity(data, str(rnum)):
-                    if sterm in s.get("skill_name", "").lower():
-                        any_match = True
-                        break
-                if any_match: break
-            if not any_match: return False
+            if not any(rnum in search_groups for rnum in combo):
+                return False
+
+        if slot_pattern is not None:
+            hit = pattern_hits.get(c.slots_info)
+            if hit is None:
+                hit = pattern_hits[c.slots_info] = slots_info_matches(c.slots_info, slot_pattern)
+            if not hit:
+                return False
 
         for idx, sel in enumerate(selected_skills):
             if not sel: continue
@@ -56,40 +116,33 @@ def filter_combos(
             
             if rnum is None: return False
             
-            all_skills_for_rnum = get_skills_for_rarity(data, str(rnum))
-            skill_names = [s.get("skill_name") for s in all_skills_for_rnum]
-            if sel not in skill_names:
+            if not index.has_skill(rnum, sel):
                 return False
 
             sel_level = selected_levels[idx] if idx < len(selected_levels) else None
-            if sel_level:
-                found_match = False
-                for s in all_skills_for_rnum:
-                    if s.get("skill_name") == sel and str(s.get("skill_level")) == str(sel_level):
-                        found_match = True
-                        break
-                if not found_match:
-                    return False
+            if sel_level and not index.has_level(rnum, sel, sel_level):
+                return False
         return True
 
     return [c for c in all_combos if combo_passes(c)]
 
 
 def options_per_position(
-    data: Dict[str, Any], filtered: List[Dict[str, Any]], positions: int
+    index: SkillIndex, filtered: List[Combo], positions: int
 ) -> List[List[str]]:
     opts: List[set] = [set() for _ in range(positions)]
+    seen: List[Set[Any]] = [set() for _ in range(positions)]
     for c in filtered:
-        combo = c.get("combination", [])
+        combo = c.combination
         for i in range(positions):
             rnum = combo[i] if i < len(combo) else None
+            if rnum in seen[i]:
+                continue
+            seen[i].add(rnum)
             if rnum is None:
                 opts[i].add(NONE_TOKEN)
             else:
-                for s in get_skills_for_rarity(data, str(rnum)):
-                    name = s.get("skill_name")
-                    if name:
-                        opts[i].add(name)
+                opts[i].update(index.skill_names(rnum))
     out: List[List[str]] = []
     for s in opts:
         arr = sorted([x for x in s if x != NONE_TOKEN], key=lambda x: x.lower())
@@ -100,8 +153,8 @@ def options_per_position(
 
 
 def get_levels_for_skill_in_slot(
-    data: Dict[str, Any],
-    filtered_combos: List[Dict[str, Any]],
+    index: SkillIndex,
+    filtered_combos: List[Combo],
     slot_index: int,
     skill_name: str,
 ) -> List[str]:
@@ -109,48 +162,80 @@ def get_levels_for_skill_in_slot(
         return []
     
     possible_levels: Set[str] = set()
+    seen: Set[Any] = set()
     for c in filtered_combos:
-        combo = c.get("combination", [])
+        combo = c.combination
         if slot_index < len(combo):
             rnum = combo[slot_index]
-            if rnum is not None:
-                for skill in get_skills_for_rarity(data, str(rnum)):
-                    if skill.get("skill_name") == skill_name:
-                        possible_levels.add(str(skill.get("skill_level")))
+            if rnum is not None and rnum not in seen:
+                seen.add(rnum)
+                possible_levels.update(index.levels_for(rnum, skill_name))
                         
     return sorted(list(possible_levels), key=int)
 
 
-def rarity_label_for_position(all_combos: List[Dict[str, Any]], pos: int) -> str:
+def _label_for_groups(groups: Set[Any]) -> str:
+    vals = {"none" if r is None else str(r) for r in groups}
+    return " | ".join(sorted(list(vals))) if vals else "—"
+
+
+def rarity_label_for_position(all_combos: List[Combo], pos: int) -> str:
     vals = set()
     for c in all_combos:
-        combo = c.get("combination", [])
-        r = combo[pos] if pos < len(combo) else None
-        vals.add("none" if r is None else str(r))
-    return " | ".join(sorted(list(vals))) if vals else "—"
+        combo = c.combination
+        vals.add(combo[pos] if pos < len(combo) else None)
+    return _label_for_groups(vals)
 
 
-def aggregated_results(
-    data: Dict[str, Any],
-    filtered: List[Dict[str, Any]],
-    selected_skills: List[Any],
-) -> List[Dict[str, Any]]:
-    if not filtered: return []
+class RarityMeta:
+    """Facts about one rarity that don't depend on the current selection."""
 
-    max_len = max((len(c.get("combination", [])) for c in filtered), default=0)
+    def __init__(self, index: SkillIndex, combos: List[Combo]):
+        self.combo_count = len(combos)
+        self.max_slots = compute_max_slots(combos)
+        # rarity numbers (None = empty) seen at each position
+        self.position_groups: List[Set[Any]] = [set() for _ in range(self.max_slots)]
+        for c in combos:
+            combo = c.combination
+            for i in range(self.max_slots):
+                self.position_groups[i].add(combo[i] if i < len(combo) else None)
+        self.labels: List[str] = [_label_for_groups(g) for g in self.position_groups]
+        # every option a slot can offer, in options_per_position order
+        self.skill_universe: List[List[str]] = options_per_position(index, combos, self.max_slots)
+
+
+def build_rarity_meta(data: Dict[str, Any], index: SkillIndex) -> Dict[str, RarityMeta]:
+    return {str(k): RarityMeta(index, combos_for_rarity(data, k)) for k in data.get("rarity", {}).keys()}
+
+
+def totals_available(filtered: List[Combo], selected_skills: List[Any]) -> bool:
+    """Totals only make sense once every slot some combo fills has a selection."""
+    if not filtered: return False
+
+    max_len = max((len(c.combination) for c in filtered), default=0)
     for i in range(max_len):
-        any_non_null = any((c.get("combination", [None] * max_len)[i] is not None) for c in filtered)
+        any_non_null = any((i < len(c.combination) and c.combination[i] is not None) for c in filtered)
         if any_non_null and (i >= len(selected_skills) or not selected_skills[i]):
-            return []
+            return False
+    return True
 
-    results = []
-    for c in filtered:
-        combo = c.get("combination", [])
-        totals: Dict[str, int] = {}
-        for i, sel in enumerate(selected_skills):
-            if not sel or sel == NONE_TOKEN: continue
-            rnum = combo[i] if i < len(combo) else None
-            lvl = lookup_level(data, rnum, sel)
-            totals[sel] = totals.get(sel, 0) + int(lvl)
-        results.append({"combo": combo, "totals": totals})
-    return results
\ No newline at end of file
+
+def combo_totals(index: SkillIndex, c: Combo, selected_skills: List[Any]) -> Dict[str, int]:
+    combo = c.combination
+    totals: Dict[str, int] = {}
+    for i, sel in enumerate(selected_skills):
+        if not sel or sel == NONE_TOKEN: continue
+        rnum = combo[i] if i < len(combo) else None
+        lvl = index.lookup_level(rnum, sel)
+        totals[sel] = totals.get(sel, 0) + int(lvl)
+    return totals
+
+
+def aggregated_results(
+    index: SkillIndex,
+    filtered: List[Combo],
+    selected_skills: List[Any],
+) -> List[Dict[str, Any]]:
+    if not totals_available(filtered, selected_skills):
+        return []
+    return [{"combo": list(c.combination), "totals": combo_totals(index, c, selected_skills)} for c in filtered]
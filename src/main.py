@@ -1,17 +1,28 @@
+import multiprocessing
 import sys
-import os
-from ui import CharmCombo
+from paths import data_file_path
+import profiling
 
-def resource_path(relative_path: str) -> str:
-    try:
-        base_path = sys._MEIPASS
-    except Exception:
-        base_path = os.path.dirname(os.path.abspath(__file__))
+if __name__ == "__main__":
+    multiprocessing.freeze_support()
+    argv = sys.argv[1:]
+    instrumentation = profiling.configure(argv)
+    if argv and argv[0] == "query":
+        if instrumentation is not None:
+            profiling.install(instrumentation)
+        from cli import main as cli_main
+        sys.exit(cli_main(argv[1:]))
+    if argv and argv[0] == "export":
+        if instrumentation is not None:
+            profiling.install(instrumentation)
+        from cli import export_main
+        sys.exit(export_main(argv[1:]))
 
-    return os.path.join(base_path, relative_path)
+    from ui import CharmCombo
+    if instrumentation is not None:
+        profiling.install(instrumentation, CharmCombo)
 
-if __name__ == "__main__":
-    json_file_path = resource_path("extracted_data.json")
+    json_file_path = data_file_path()
     
     app = CharmCombo(json_path=json_file_path)
-    app.mainloop()
\ No newline at end of file
+    app.mainloop()
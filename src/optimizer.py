@@ -0,0 +1,116 @@
+import heapq
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from data_loader import SkillIndex
+from records import Combo
+
+SlotChoices = List[List[Tuple[str, int]]]
+
+
+def _suffix_bounds(per_slot: SlotChoices, names: List[str]) -> Tuple[List[int], List[Dict[str, int]]]:
+    """Per slot i: best total target level still reachable from slots i.., overall and per skill."""
+    n = len(per_slot)
+    best = [0] * (n + 1)
+    per_skill: List[Dict[str, int]] = [dict.fromkeys(names, 0) for _ in range(n + 1)]
+    for i in range(n - 1, -1, -1):
+        best[i] = best[i + 1] + max((lvl for _, lvl in per_slot[i]), default=0)
+        per_skill[i] = dict(per_skill[i + 1])
+        for name, lvl in per_slot[i]:
+            per_skill[i][name] += lvl
+    return best, per_skill
+
+
+def _best_assignment(
+    per_slot: SlotChoices,
+    targets: Dict[str, int],
+    best_rest: List[int],
+    skill_rest: List[Dict[str, int]],
+    threshold: int,
+) -> Optional[Tuple[int, List[Optional[str]], Dict[str, int]]]:
+    n = len(per_slot)
+    best: List[Any] = [threshold, None, None]
+    chosen: List[Optional[str]] = [None] * n
+    totals = dict.fromkeys(targets, 0)
+
+    def dfs(i: int, score: int) -> None:
+        if score + best_rest[i] <= best[0]:
+            return
+        for name, need in targets.items():
+            if totals[name] + skill_rest[i][name] < need:
+                return
+        if i == n:
+            best[0], best[1], best[2] = score, list(chosen), dict(totals)
+            return
+        for name, lvl in per_slot[i]:
+            chosen[i] = name
+            totals[name] += lvl
+            dfs(i + 1, score + lvl)
+            totals[name] -= lvl
+        chosen[i] = None
+        dfs(i + 1, score)
+
+    dfs(0, 0)
+    if best[1] is None:
+        return None
+    return best[0], best[1], best[2]
+
+
+def optimize(
+    index: SkillIndex,
+    combos_by_rarity: Iterable[Tuple[str, List[Combo]]],
+    targets: Dict[str, int],
+    top_n: int = 10,
+) -> List[Dict[str, Any]]:
+    """Best ``top_n`` combos for ``targets`` (skill name -> minimum total level).
+
+    Each slot of a combo takes at most one target skill at its group's max
+    level; a combo qualifies when every target reaches its minimum, and is
+    ranked by the summed target levels. Combos are visited in order of their
+    upper bound so the search stops as soon as no remaining combo can beat
+    the current top N, and each combo's assignment search is pruned with the
+    same per-group max-level bounds.
+    """
+    targets = {name: int(need or 0) for name, need in targets.items() if name}
+    names = list(targets)
+    if not names or top_n <= 0:
+        return []
+
+    candidates = []
+    for rarity, combos in combos_by_rarity:
+        for c in combos:
+            combo = c.combination
+            per_slot: SlotChoices = []
+            for rnum in combo:
+                levels = index.skill_names(rnum)
+                choices = [(name, levels[name]) for name in names if name in levels]
+                choices.sort(key=lambda x: -x[1])
+                per_slot.append(choices)
+            best_rest, skill_rest = _suffix_bounds(per_slot, names)
+            if any(skill_rest[0][name] < need for name, need in targets.items()):
+                continue
+            candidates.append((best_rest[0], len(candidates), rarity, c, per_slot, best_rest, skill_rest))
+    candidates.sort(key=lambda x: (-x[0], x[1]))
+
+    heap: List[Tuple[int, int, Dict[str, Any]]] = []
+    for bound, seq, rarity, c, per_slot, best_rest, skill_rest in candidates:
+        full = len(heap) >= top_n
+        if full and bound <= heap[0][0]:
+            break
+        found = _best_assignment(per_slot, targets, best_rest, skill_rest, heap[0][0] if full else -1)
+        if found is None:
+            continue
+        score, assignment, totals = found
+        entry = {
+            "rarity": rarity,
+            "combo": list(c.combination),
+            "assignment": assignment,
+            "levels": [index.lookup_level(r, a) if a else 0 for r, a in zip(c.combination, assignment)],
+            "totals": totals,
+            "score": score,
+        }
+        item = (score, -seq, entry)
+        if full:
+            heapq.heapreplace(heap, item)
+        else:
+            heapq.heappush(heap, item)
+    return [entry for _, _, entry in sorted(heap, key=lambda x: (-x[0], -x[1]))]
@@ -0,0 +1,44 @@
+import os
+import sys
+import tempfile
+from typing import Any, Callable
+
+DATA_ENV_VAR = "CHARM_DATA"
+
+
+def resource_path(relative_path: str) -> str:
+    try:
+        base_path = sys._MEIPASS
+    except Exception:
+        base_path = os.path.dirname(os.path.abspath(__file__))
+
+    return os.path.join(base_path, relative_path)
+
+
+def data_file_path() -> str:
+    override = os.environ.get(DATA_ENV_VAR)
+    if override:
+        return os.path.abspath(override)
+    compact_path = resource_path("extracted_data.bin")
+    if os.path.exists(compact_path):
+        return compact_path
+    return resource_path("extracted_data.json")
+
+
+def replace_atomically(path: str, write: Callable[[str], Any], suffix: str = ".tmp") -> Any:
+    """Call ``write`` with a temp file next to ``path``, then move it over ``path``.
+
+    If ``write`` raises, the temp file is removed and ``path`` is left as it was.
+    Returns whatever ``write`` returned.
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp = tempfile.mkstemp(dir=directory, suffix=suffix)
+    os.close(fd)
+    try:
+        result = write(tmp)
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+    return result
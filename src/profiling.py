@@ -0,0 +1,221 @@
+"""Opt-in timing of the refresh pipeline.
+
+Enabled with ``CHARM_PROFILE=1`` (or ``--profile`` on the command line);
+``CHARM_PROFILE=cprofile`` (``--profile=cprofile``) also records a cProfile
+session. When disabled nothing here is installed, so the hot paths run the
+original, unwrapped functions.
+"""
+import atexit
+import cProfile
+import functools
+import json
+import os
+import pstats
+import sys
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Deque, Dict, List, Optional
+
+ENV_VAR = "CHARM_PROFILE"
+ENV_OUT = "CHARM_PROFILE_OUT"
+DEFAULT_OUT = "charm_profile"
+WINDOW = 500
+
+# stage name -> (module or class attribute owner name, attribute)
+QUERY_STAGES = [
+    ("filtering", "CharmQuery", "filter"),
+    ("options", "query", "options_per_position"),
+    ("levels", "query", "get_levels_for_skill_in_slot"),
+    ("aggregation", "query", "aggregated_results"),
+]
+UI_STAGES = [
+    ("compute", "_compute_refresh"),
+    ("tree_refresh", "_refresh_combos_tree"),
+    ("results_render", "_refresh_results"),
+]
+COUNTED_LOOKUPS = ["skill_names", "has_skill", "has_level", "levels_for", "lookup_level"]
+
+
+def _percentile(sorted_vals: List[float], pct: float) -> float:
+    if not sorted_vals:
+        return 0.0
+    k = min(len(sorted_vals) - 1, max(0, int(round(pct / 100.0 * (len(sorted_vals) - 1)))))
+    return sorted_vals[k]
+
+
+class Instrumentation:
+    def __init__(self, mode: str = "timing", out_path: str = DEFAULT_OUT, window: int = WINDOW):
+        self.mode = mode
+        self.out_path = out_path
+        self.samples: Dict[str, Deque[float]] = {}
+        self.totals: Dict[str, int] = {}
+        self.counters: Dict[str, int] = {}
+        # name -> LRUCache whose stats() go into the report
+        self.caches: Dict[str, Any] = {}
+        self._window = window
+        self._lock = threading.Lock()
+        self.profiler: Optional[cProfile.Profile] = None
+        self.worker_profiler: Optional[cProfile.Profile] = None
+
+    def record(self, stage: str, seconds: float) -> None:
+        with self._lock:
+            buf = self.samples.get(stage)
+            if buf is None:
+                buf = self.samples[stage] = deque(maxlen=self._window)
+            buf.append(seconds)
+            self.totals[stage] = self.totals.get(stage, 0) + 1
+
+    def count(self, name: str) -> None:
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + 1
+
+    def watch_cache(self, name: str, cache: Any) -> None:
+        self.caches[name] = cache
+
+    def cache_stats(self) -> Dict[str, Dict[str, int]]:
+        return {name: cache.stats() for name, cache in self.caches.items()}
+
+    def timed(self, stage: str, fn: Callable) -> Callable:
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            t0 = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                self.record(stage, time.perf_counter() - t0)
+        return wrapper
+
+    def counted(self, name: str, fn: Callable) -> Callable:
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            self.count(name)
+            return fn(*args, **kwargs)
+        return wrapper
+
+    def percentiles(self) -> Dict[str, Dict[str, float]]:
+        with self._lock:
+            snap = {k: sorted(v) for k, v in self.samples.items()}
+            totals = dict(self.totals)
+        return {
+            stage: {
+                "calls": totals.get(stage, 0),
+                "p50_ms": _percentile(vals, 50) * 1000,
+                "p90_ms": _percentile(vals, 90) * 1000,
+                "p99_ms": _percentile(vals, 99) * 1000,
+                "max_ms": (vals[-1] if vals else 0.0) * 1000,
+            }
+            for stage, vals in snap.items()
+        }
+
+    def status_line(self) -> str:
+        parts = [f"{stage} p50 {p['p50_ms']:.2f}/p90 {p['p90_ms']:.2f} ms" for stage, p in self.percentiles().items()]
+        for name, s in self.cache_stats().items():
+            lookups = s["hits"] + s["misses"]
+            if lookups:
+                parts.append(f"{name} cache {100 * s['hits'] // lookups}% hits")
+        return " · ".join(parts)
+
+    def report(self) -> Dict[str, Any]:
+        with self._lock:
+            counters = dict(self.counters)
+        return {
+            "mode": self.mode,
+            "window": self._window,
+            "stages": self.percentiles(),
+            "lookups": counters,
+            "caches": self.cache_stats(),
+        }
+
+    def dump(self) -> None:
+        with open(self.out_path + ".json", "w", encoding="utf-8") as f:
+            json.dump(self.report(), f, indent=2)
+        if self.profiler is not None:
+            self.profiler.disable()
+            stats = pstats.Stats(self.profiler)
+            if self.worker_profiler is not None:
+                try:
+                    stats.add(self.worker_profiler)
+                except TypeError:
+                    pass  # the worker never ran a refresh, so it has no stats to merge
+            stats.dump_stats(self.out_path + ".prof")
+
+
+def _wrap(owner: Any, attr: str, wrap: Callable[[Callable], Callable]) -> None:
+    setattr(owner, attr, wrap(getattr(owner, attr)))
+
+
+def install(instr: Instrumentation, ui_class: Any = None) -> Instrumentation:
+    """Wrap the pipeline stages with timers; call before the app or query object is created."""
+    import data_loader
+    import query
+
+    owners = {"CharmQuery": query.CharmQuery, "query": query}
+    for stage, owner, attr in QUERY_STAGES:
+        _wrap(owners[owner], attr, functools.partial(instr.timed, stage))
+    for name in COUNTED_LOOKUPS:
+        _wrap(data_loader.SkillIndex, name, functools.partial(instr.counted, f"SkillIndex.{name}"))
+
+    query_init = query.CharmQuery.__init__
+
+    @functools.wraps(query_init)
+    def init_and_watch(self, *args, **kwargs):
+        query_init(self, *args, **kwargs)
+        # a reload builds a new CharmQuery, so the newest one's cache is the live one
+        instr.watch_cache("derived", self.derived_cache)
+    query.CharmQuery.__init__ = init_and_watch
+
+    if ui_class is not None:
+        for stage, attr in UI_STAGES:
+            _wrap(ui_class, attr, functools.partial(instr.timed, stage))
+
+        apply_refresh = ui_class._apply_refresh
+
+        @functools.wraps(apply_refresh)
+        def apply_with_status(self, result):
+            t0 = time.perf_counter()
+            apply_refresh(self, result)
+            instr.record("apply", time.perf_counter() - t0)
+            instr.watch_cache("slot_options", self.slot_options_cache)
+            self.status_var.set(f"{self.status_var.get()} — {instr.status_line()}")
+        ui_class._apply_refresh = apply_with_status
+
+    if instr.mode == "cprofile":
+        instr.profiler = cProfile.Profile()
+        # Before 3.12 a profiler only sees the thread that enabled it, so the
+        # refresh computation on the scheduler's worker thread gets one of its
+        # own. From 3.12 on the main profiler covers every thread and a second
+        # one refuses to start ("Another profiling tool is already active").
+        if ui_class is not None and sys.version_info < (3, 12):
+            instr.worker_profiler = cProfile.Profile()
+            compute = ui_class._compute_refresh
+            ui_class._compute_refresh = functools.wraps(compute)(
+                lambda self, snap: instr.worker_profiler.runcall(compute, self, snap)
+            )
+        instr.profiler.enable()
+
+    atexit.register(instr.dump)
+    return instr
+
+
+def configure(argv: List[str], environ: Optional[Dict[str, str]] = None) -> Optional[Instrumentation]:
+    """Build an Instrumentation from ``--profile[=MODE]``/``--profile-out=PATH`` or the environment.
+
+    Returns None when profiling is off. The profiling flags are removed from ``argv``.
+    """
+    environ = os.environ if environ is None else environ
+    mode = environ.get(ENV_VAR, "").strip().lower()
+    out_path = environ.get(ENV_OUT, DEFAULT_OUT)
+    for arg in list(argv):
+        if arg == "--profile" or arg.startswith("--profile="):
+            mode = arg.partition("=")[2] or "timing"
+            argv.remove(arg)
+        elif arg.startswith("--profile-out="):
+            out_path = arg.partition("=")[2]
+            argv.remove(arg)
+
+    if mode in ("", "0", "off", "false", "no"):
+        return None
+    if mode != "cprofile":
+        mode = "timing"
+    return Instrumentation(mode, out_path)
@@ -0,0 +1,249 @@
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from cache import LRUCache
+from data_loader import SkillIndex, load_data
+from filter_engine import FilterEngine, FilterState, build_filter_engine, mask_indices
+from filters import (
+    NONE_TOKEN,
+    RarityMeta,
+    aggregated_results,
+    build_rarity_meta,
+    combos_for_rarity,
+    get_levels_for_skill_in_slot,
+    options_per_position,
+    parse_slot_pattern,
+)
+from optimizer import optimize
+from records import Combo, to_records
+
+NONE_DISPLAY = "— none —"
+ALL_RARITIES = "*"
+DERIVED_CACHE_SIZE = 512
+
+
+def normalize_selection(values: Optional[List[Any]], positions: int) -> List[Any]:
+    if values is not None and not isinstance(values, (list, tuple)):
+        # a bare string would otherwise be read one character per slot
+        raise ValueError(f"expected a list with one entry per slot, got {values!r}")
+    out: List[Any] = []
+    for v in list(values or [])[:positions]:
+        if v == NONE_DISPLAY:
+            v = NONE_TOKEN
+        out.append(v if v else None)
+    out += [None] * (positions - len(out))
+    return out
+
+
+def selection_key(
+    rarity: Any, skills: List[Any], levels: List[Any], search: str, slots: Any = None
+) -> Tuple[Any, ...]:
+    """Hashable form of a query; levels only count for slots that have a skill."""
+    return (
+        str(rarity),
+        tuple(skills),
+        tuple(str(lvl) if lvl and sel and sel != NONE_TOKEN else None for sel, lvl in zip(skills, levels)),
+        (search or "").strip().lower(),
+        parse_slot_pattern(slots),
+    )
+
+
+class CharmQuery:
+    """Headless entry point to the filter pipeline; needs no tkinter.
+
+    Holds the skill index plus one ``FilterEngine``/``FilterState`` per rarity,
+    built the first time that rarity is queried. The pseudo-rarity
+    ``ALL_RARITIES`` is every rarity's combos back to back under a single
+    engine, so a cross-rarity query is one pass over shared masks. The filter
+    states are mutated by every query, so queries must come from one thread
+    at a time. Nothing here is invalidated in place: new data means a new
+    ``CharmQuery`` (see ``reload.DataReloader``).
+    """
+
+    def __init__(self, data: Dict[str, Any]):
+        self.data = to_records(data)
+        self.index = SkillIndex(self.data)
+        self.meta: Dict[str, RarityMeta] = build_rarity_meta(self.data, self.index)
+        self._combos: Dict[str, List[Combo]] = {}
+        self._engines: Dict[str, FilterEngine] = {}
+        self._states: Dict[str, FilterState] = {}
+        # rarity -> (first bit, combo count) inside the ALL_RARITIES engine
+        self._all_ranges: Dict[str, Tuple[int, int]] = {}
+        # (rarity, skills, levels, search) -> (options, levels) for that selection
+        self.derived_cache = LRUCache(DERIVED_CACHE_SIZE)
+
+    @classmethod
+    def from_path(cls, path: str) -> "CharmQuery":
+        return cls(load_data(path))
+
+    def rarities(self) -> List[str]:
+        return sorted((str(k) for k in self.data.get("rarity", {}).keys()), key=lambda x: int(x))
+
+    def combos(self, rarity: Any) -> List[Combo]:
+        key = str(rarity)
+        combos = self._combos.get(key)
+        if combos is None:
+            if key == ALL_RARITIES:
+                combos = []
+                for r in self.rarities():
+                    part = self.combos(r)
+                    self._all_ranges[r] = (len(combos), len(part))
+                    combos.extend(part)
+            else:
+                combos = combos_for_rarity(self.data, key)
+            self._combos[key] = combos
+        return combos
+
+    def engine(self, rarity: Any) -> FilterEngine:
+        key = str(rarity)
+        engine = self._engines.get(key)
+        if engine is None:
+            engine = build_filter_engine(self.index, self.combos(key))
+            self._engines[key] = engine
+        return engine
+
+    def state(self, rarity: Any) -> FilterState:
+        key = str(rarity)
+        state = self._states.get(key)
+        if state is None:
+            state = FilterState(self.engine(key))
+            self._states[key] = state
+        return state
+
+    def rarity_meta(self, rarity: Any) -> RarityMeta:
+        key = str(rarity)
+        meta = self.meta.get(key)
+        if meta is None:
+            self.check_rarity(key)
+            meta = self.meta[key] = RarityMeta(self.index, self.combos(key))
+        return meta
+
+    def check_rarity(self, rarity: Any) -> str:
+        key = str(rarity)
+        if key != ALL_RARITIES and key not in self.meta:
+            raise ValueError(f"unknown rarity {key!r}, expected one of {', '.join(self.rarities())} or {ALL_RARITIES!r}")
+        return key
+
+    def slot_count(self, rarity: Any) -> int:
+        return self.rarity_meta(rarity).max_slots
+
+    def filter(
+        self,
+        rarity: Any,
+        skills: Optional[List[Any]] = None,
+        levels: Optional[List[Any]] = None,
+        search: str = "",
+        slots: Any = None,
+    ) -> List[Combo]:
+        """``slots`` is a decoration slot pattern, see ``filters.parse_slot_pattern``."""
+        positions = self.slot_count(rarity)
+        return self.state(rarity).filter(
+            normalize_selection(skills, positions),
+            normalize_selection(levels, positions),
+            search or "",
+            parse_slot_pattern(slots),
+        )
+
+    def group_by_rarity(
+        self,
+        skills: Optional[List[Any]] = None,
+        levels: Optional[List[Any]] = None,
+        search: str = "",
+        slots: Any = None,
+    ) -> Dict[str, List[Combo]]:
+        """Filter every rarity in one pass and return the matches keyed by rarity."""
+        self.filter(ALL_RARITIES, skills, levels, search, slots)
+        return self.split_by_rarity(self.state(ALL_RARITIES).last_mask)
+
+    def rarity_of(self, rarity: Any) -> Callable[[Combo], str]:
+        """Maps a combo from ``combos(rarity)`` to the rarity it belongs to."""
+        key = str(rarity)
+        if key != ALL_RARITIES:
+            return lambda c: key
+        owner = {id(c): r for r in self.rarities() for c in self.combos(r)}
+        return lambda c: owner[id(c)]
+
+    def split_by_rarity(self, mask: int) -> Dict[str, List[Combo]]:
+        self.combos(ALL_RARITIES)
+        out: Dict[str, List[Combo]] = {}
+        for r, (start, count) in self._all_ranges.items():
+            part = (mask >> start) & ((1 << count) - 1)
+            if part:
+                combos = self.combos(r)
+                out[r] = [combos[i] for i in mask_indices(part)]
+        return out
+
+    def run(
+        self,
+        rarity: Any,
+        skills: Optional[List[Any]] = None,
+        levels: Optional[List[Any]] = None,
+        search: str = "",
+        slots: Any = None,
+    ) -> Dict[str, Any]:
+        positions = self.slot_count(rarity)
+        skills = normalize_selection(skills, positions)
+        levels = normalize_selection(levels, positions)
+        filtered = self.filter(rarity, skills, levels, search, slots)
+        key = selection_key(rarity, skills, levels, search, slots)
+
+        meta = self.rarity_meta(rarity)
+
+        def derive() -> Tuple[List[List[str]], List[List[str]]]:
+            unfiltered = len(filtered) == meta.combo_count
+            return (
+                meta.skill_universe if unfiltered else options_per_position(self.index, filtered, positions),
+                [
+                    get_levels_for_skill_in_slot(self.index, filtered, i, skills[i]) if skills[i] else []
+                    for i in range(positions)
+                ],
+            )
+
+        options, slot_levels = self.derived_cache.get_or_compute(key, derive)
+        res = {
+            "rarity": str(rarity),
+            "count": len(filtered),
+            "combos": filtered,
+            "options": options,
+            "levels": slot_levels,
+            "labels": meta.labels,
+            "results": aggregated_results(self.index, filtered, skills),
+        }
+        if str(rarity) == ALL_RARITIES:
+            # The same pattern occurs in several rarities, so tag every result with its own.
+            groups = self.split_by_rarity(self.state(ALL_RARITIES).last_mask)
+            owner = {id(c): r for r, part in groups.items() for c in part}
+            by_rarity = {r: {"count": len(part), "combos": part, "results": []} for r, part in groups.items()}
+            for c, item in zip(filtered, res["results"]):
+                item["rarity"] = owner[id(c)]
+                by_rarity[item["rarity"]]["results"].append(item)
+            res["by_rarity"] = by_rarity
+        return res
+
+    def optimize(
+        self,
+        targets: Dict[str, int],
+        rarity: Any = None,
+        top_n: int = 10,
+    ) -> List[Dict[str, Any]]:
+        """Top ``top_n`` combos for ``targets`` in ``rarity``, or across every rarity when it is None."""
+        if rarity in (None, "", ALL_RARITIES):
+            rarities = self.rarities()
+        else:
+            rarities = [self.check_rarity(rarity)]
+        return optimize(self.index, ((r, self.combos(r)) for r in rarities), targets, top_n)
+
+
+def evaluate(cq: CharmQuery, q: Dict[str, Any]) -> Dict[str, Any]:
+    """Run one query dict (as read from a JSON line) and return its result or an error record."""
+    if "parse_error" in q:
+        return {"id": None, "line": q.get("line"), "error": q["parse_error"]}
+    try:
+        if "optimize" in q:
+            res = {"optimized": cq.optimize(q["optimize"], q.get("rarity"), int(q.get("top", 10)))}
+        else:
+            res = cq.run(q["rarity"], q.get("skills"), q.get("levels"), q.get("search", ""), q.get("slots"))
+    except Exception as e:
+        res = {"error": f"{type(e).__name__}: {e}"}
+    if q.get("id") is not None:
+        res["id"] = q["id"]
+    return res
@@ -0,0 +1,76 @@
+import json
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+Combination = Tuple[Optional[int], ...]
+SlotsInfo = Tuple[Tuple[Any, ...], ...]
+
+
+class Combo:
+    """One rarity combination: rarity number per slot (None = empty) and its decoration slot layouts.
+
+    ``slots_info`` tuples are interned, so combos sharing a layout share one object.
+    """
+
+    __slots__ = ("combination", "slots_info")
+
+    def __init__(self, combination: Combination, slots_info: SlotsInfo):
+        self.combination = combination
+        self.slots_info = slots_info
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "combination": list(self.combination),
+            "slots_info": [list(s) for s in self.slots_info],
+        }
+
+    def __eq__(self, other: Any) -> bool:
+        if not isinstance(other, Combo):
+            return NotImplemented
+        return self.combination == other.combination and self.slots_info == other.slots_info
+
+    def __hash__(self) -> int:
+        return hash((self.combination, self.slots_info))
+
+    def __repr__(self) -> str:
+        return f"Combo({list(self.combination)!r}, {[list(s) for s in self.slots_info]!r})"
+
+
+class SlotsInterner:
+    def __init__(self):
+        self._seen: Dict[SlotsInfo, SlotsInfo] = {}
+
+    def __call__(self, slots_info: Iterable[Iterable[Any]]) -> SlotsInfo:
+        key = tuple(tuple(s) for s in slots_info or ())
+        return self._seen.setdefault(key, key)
+
+
+def make_combo(c: Any, intern: SlotsInterner) -> Combo:
+    if isinstance(c, Combo):
+        return c
+    return Combo(tuple(c.get("combination", [])), intern(c.get("slots_info", [])))
+
+
+def to_records(data_obj: Dict[str, Any]) -> Dict[str, Any]:
+    """Return ``data_obj`` with every combo dict replaced by a ``Combo``.
+
+    Combos that already are records (the compact loader) are kept as they are.
+    """
+    rarity = (data_obj or {}).get("rarity")
+    if not isinstance(rarity, dict):
+        return data_obj
+    intern = SlotsInterner()
+    out = dict(data_obj)
+    out["rarity"] = {k: [make_combo(c, intern) for c in combos] for k, combos in rarity.items()}
+    return out
+
+
+def json_default(obj: Any) -> Any:
+    """``default=`` hook for json.dump so results holding records serialize as before."""
+    if isinstance(obj, Combo):
+        return obj.to_dict()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def json_line(obj: Any) -> str:
+    """One JSON-lines record, newline included."""
+    return json.dumps(obj, ensure_ascii=False, default=json_default) + "\n"
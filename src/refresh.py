@@ -0,0 +1,101 @@
+import queue
+import threading
+from typing import Any, Callable, Optional, Tuple
+
+
+class RefreshScheduler:
+    """Runs a compute step off the Tk thread and applies only the newest result.
+
+    ``request`` debounces through ``after()``; each dispatched snapshot gets a
+    generation number and the worker always picks up the latest pending one,
+    so bursts of keystrokes collapse into a single computation. Results are
+    handed back through a queue that the Tk thread polls, and anything older
+    than the latest generation is dropped instead of being drawn.
+    """
+
+    POLL_MS = 15
+
+    def __init__(self, widget, compute: Callable[[Any], Any], apply: Callable[[Any], None]):
+        self._widget = widget
+        self._compute = compute
+        self._apply = apply
+
+        self._generation = 0
+        self._dispatched = 0
+        self._after_id: Optional[str] = None
+        self._poll_id: Optional[str] = None
+
+        self._cond = threading.Condition()
+        self._job: Optional[Tuple[int, Any]] = None
+        self._closed = False
+        self._results: "queue.Queue[Tuple[int, Any, Optional[BaseException]]]" = queue.Queue()
+
+        self._worker = threading.Thread(target=self._run, name="refresh-worker", daemon=True)
+        self._worker.start()
+
+    def request(self, snapshot: Any, delay_ms: int = 0) -> None:
+        if self._after_id is not None:
+            self._widget.after_cancel(self._after_id)
+        self._after_id = self._widget.after(delay_ms, self._dispatch, snapshot)
+
+    def _dispatch(self, snapshot: Any) -> None:
+        self._after_id = None
+        self._generation += 1
+        self._dispatched = self._generation
+        with self._cond:
+            self._job = (self._generation, snapshot)
+            self._cond.notify()
+        if self._poll_id is None:
+            self._poll_id = self._widget.after(self.POLL_MS, self._poll)
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                while self._job is None and not self._closed:
+                    self._cond.wait()
+                if self._closed:
+                    return
+                generation, snapshot = self._job
+                self._job = None
+            try:
+                self._results.put((generation, self._compute(snapshot), None))
+            except BaseException as e:
+                self._results.put((generation, None, e))
+
+    def _poll(self) -> None:
+        self._poll_id = None
+        latest = None
+        try:
+            while True:
+                latest = self._results.get_nowait()
+        except queue.Empty:
+            pass
+
+        if latest is not None and latest[0] == self._generation:
+            _, result, error = latest
+            if error is not None:
+                self._widget.report_callback_exception(type(error), error, error.__traceback__)
+            else:
+                self._apply(result)
+            return
+        if self._dispatched != self._generation:
+            return  # cancelled: whatever is still in flight will be discarded on a later poll
+        self._poll_id = self._widget.after(self.POLL_MS, self._poll)
+
+    def cancel(self) -> None:
+        """Drop the pending request and any result still being computed."""
+        if self._after_id is not None:
+            self._widget.after_cancel(self._after_id)
+            self._after_id = None
+        self._generation += 1
+
+    def close(self) -> None:
+        if self._after_id is not None:
+            self._widget.after_cancel(self._after_id)
+            self._after_id = None
+        if self._poll_id is not None:
+            self._widget.after_cancel(self._poll_id)
+            self._poll_id = None
+        with self._cond:
+            self._closed = True
+            self._cond.notify()
@@ -0,0 +1,126 @@
+import hashlib
+import os
+import queue
+import threading
+from typing import Any, Callable, Optional, Tuple
+
+
+def file_signature(path: str) -> Optional[Tuple[int, int]]:
+    """(mtime_ns, size) of ``path``, or None while it doesn't exist."""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return st.st_mtime_ns, st.st_size
+
+
+def file_sha256(path: str) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+class DataReloader:
+    """Watches a data file from the Tk thread and reloads it on a background thread.
+
+    Every ``POLL_MS`` the file is stat-ed; only when its mtime or size moves is
+    it hashed, so touching the file without changing it costs one checksum
+    and no reload. A changed file goes through ``load`` on a worker thread and
+    the result is handed to ``apply`` back on the Tk thread. A load that
+    fails (e.g. the file is caught half-written) goes to ``error`` and is
+    retried on the next change. Only one load runs at a time.
+    """
+
+    POLL_MS = 2000
+    BUSY_POLL_MS = 50
+
+    def __init__(
+        self,
+        widget,
+        path: str,
+        load: Callable[[str], Any],
+        apply: Callable[[Any], None],
+        error: Callable[[BaseException], None],
+    ):
+        self._widget = widget
+        self.path = path
+        self._load = load
+        self._apply = apply
+        self._error = error
+
+        self._signature = file_signature(path)
+        self._digest: Optional[str] = None
+        self._busy = False
+        self._closed = False
+        self._results: "queue.Queue[Tuple[str, Any, Optional[BaseException]]]" = queue.Queue()
+        self._after_id: Optional[str] = None
+
+        # Hash the file we started from so the first change can be told apart from a touch.
+        self._start(self._prime)
+
+    def _start(self, job: Callable[[], Tuple[str, Any]]) -> None:
+        self._busy = True
+
+        def run() -> None:
+            try:
+                self._results.put(job() + (None,))
+            except BaseException as e:
+                self._results.put(("error", None, e))
+
+        threading.Thread(target=run, name="data-reload", daemon=True).start()
+        self._schedule()
+
+    def _prime(self) -> Tuple[str, Any]:
+        return "digest", file_sha256(self.path)
+
+    def _reload(self, force: bool = False) -> Tuple[str, Any]:
+        digest = file_sha256(self.path)
+        if digest == self._digest and not force:
+            return "digest", digest
+        return "loaded", (digest, self._load(self.path))
+
+    def _schedule(self) -> None:
+        if not self._closed and self._after_id is None:
+            self._after_id = self._widget.after(self.BUSY_POLL_MS if self._busy else self.POLL_MS, self._poll)
+
+    def _poll(self) -> None:
+        self._after_id = None
+        if self._busy:
+            try:
+                kind, payload, error = self._results.get_nowait()
+            except queue.Empty:
+                self._schedule()
+                return
+            self._busy = False
+            if error is not None:
+                self._error(error)
+            elif kind == "digest":
+                self._digest = payload
+            else:
+                self._digest, loaded = payload
+                self._apply(loaded)
+        else:
+            signature = file_signature(self.path)
+            if signature is not None and signature != self._signature:
+                self._signature = signature
+                self._start(self._reload)
+                return
+        self._schedule()
+
+    def reload_now(self) -> None:
+        """Load the file again even if it looks unchanged."""
+        if self._busy or self._closed:
+            return
+        self._signature = file_signature(self.path)
+        if self._after_id is not None:
+            self._widget.after_cancel(self._after_id)
+            self._after_id = None
+        self._start(lambda: self._reload(force=True))
+
+    def close(self) -> None:
+        self._closed = True
+        if self._after_id is not None:
+            self._widget.after_cancel(self._after_id)
+            self._after_id = None
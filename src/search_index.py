@@ -0,0 +1,64 @@
+from typing import Any, Dict, FrozenSet, List, Set
+
+GRAM = 3
+
+
+def _grams(text: str, size: int) -> Set[str]:
+    return {text[i:i + size] for i in range(len(text) - size + 1)}
+
+
+class SearchIndex:
+    """N-gram inverted index from lowercase skill names to rarity groups.
+
+    Every 1..3-gram of every distinct name is posted, so terms of up to three
+    characters are answered by a single posting list and longer terms by
+    intersecting their trigram postings and checking the few survivors. When a
+    term extends the previous one ("fi" -> "fir") only the previous candidates
+    are re-checked.
+    """
+
+    def __init__(self, lower_names: Dict[Any, List[str]]):
+        name_groups: Dict[str, Set[Any]] = {}
+        for group, names in lower_names.items():
+            for name in names:
+                name_groups.setdefault(name, set()).add(group)
+        self.names: List[str] = sorted(name_groups)
+        self.name_groups: List[FrozenSet[Any]] = [frozenset(name_groups[n]) for n in self.names]
+
+        self.postings: Dict[str, Set[int]] = {}
+        for name_id, name in enumerate(self.names):
+            for size in range(1, GRAM + 1):
+                for g in _grams(name, size):
+                    self.postings.setdefault(g, set()).add(name_id)
+
+        self._last_term = ""
+        self._last_names: Set[int] = set(range(len(self.names)))
+        self._last_groups: FrozenSet[Any] = frozenset()
+
+    def matching_names(self, term: str) -> Set[int]:
+        if self._last_term and self._last_term in term:
+            return {i for i in self._last_names if term in self.names[i]}
+        if len(term) <= GRAM:
+            return set(self.postings.get(term, ()))
+        lists = sorted((self.postings.get(g, set()) for g in _grams(term, GRAM)), key=len)
+        candidates = set(lists[0])
+        for p in lists[1:]:
+            if not candidates:
+                break
+            candidates &= p
+        return {i for i in candidates if term in self.names[i]}
+
+    def groups_for(self, term: str) -> FrozenSet[Any]:
+        term = (term or "").strip().lower()
+        if not term:
+            return frozenset()
+        if term == self._last_term:
+            return self._last_groups
+        name_ids = self.matching_names(term)
+        groups: Set[Any] = set()
+        for i in name_ids:
+            groups |= self.name_groups[i]
+        self._last_term = term
+        self._last_names = name_ids
+        self._last_groups = frozenset(groups)
+        return self._last_groups
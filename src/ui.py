@@ -1,18 +1,43 @@
+import threading
 import tkinter as tk
-from tkinter import ttk, messagebox
-from typing import Any, Dict, List, Optional
-
-from data_loader import load_json, get_skills_for_rarity, list_skill_names_for_rarity, lookup_level
-from filters import (
-    NONE_TOKEN,
-    combos_for_rarity,
-    compute_max_slots,
-    filter_combos,
-    options_per_position,
-    rarity_label_for_position,
-    aggregated_results,
-    get_levels_for_skill_in_slot,
-)
+from tkinter import ttk, filedialog, messagebox
+from typing import Any, Dict, List, Optional, Tuple
+
+from data_loader import load_data
+from export import export_skill_names, export_to_path, format_for_path, iter_records
+from filters import NONE_TOKEN
+from cache import LRUCache
+from filters import get_levels_for_skill_in_slot, parse_slot_pattern
+from query import ALL_RARITIES, NONE_DISPLAY, CharmQuery, normalize_selection, selection_key
+from records import Combo
+from refresh import RefreshScheduler
+from reload import DataReloader
+
+SEARCH_DEBOUNCE_MS = 150
+TREE_PAGE_SIZE = 500
+RESULTS_PAGE_SIZE = 200
+EXPORT_POLL_MS = 100
+OPTIMIZE_POLL_MS = 50
+ALL_RARITIES_LABEL = "All"
+
+
+def format_results(res: List[Dict[str, Any]], start: int = 0, limit: int = RESULTS_PAGE_SIZE) -> str:
+    """Text for ``res[start:start + limit]``, numbered by position in the full list."""
+    if not res:
+        return "Select every non-empty slot to compute aggregated skill levels.\n"
+    lines: List[str] = []
+    for idx, r in enumerate(res[start:start + limit], start=start + 1):
+        rarity = f"  Rarity: {r['rarity']}\n" if "rarity" in r else ""
+        lines.append(f"Result #{idx}\n{rarity}  Pattern: {r['combo']}\n")
+        totals = r.get("totals", {})
+        if not totals:
+            lines.append("  (no skills)\n\n")
+        else:
+            for name, lvl in sorted(totals.items()):
+                lines.append(f"  {name}: level {lvl}\n")
+            lines.append("\n")
+    return "".join(lines)
+
 
 class SlotRow(ttk.Frame):
     def __init__(self, master, row_index: int, search_var: tk.StringVar, skill_var: tk.StringVar,
@@ -60,6 +85,109 @@ class SlotRow(ttk.Frame):
         self.rarity_details_label.config(text=f"(rarity: {label_text})")
 
 
+def parse_targets(text: str) -> Dict[str, int]:
+    """Parse "Attack Boost:3, Artillery" into {"Attack Boost": 3, "Artillery": 1}."""
+    targets: Dict[str, int] = {}
+    for part in text.split(","):
+        name, sep, need = part.rpartition(":")
+        if not sep:
+            name, need = need, ""
+        name = name.strip()
+        if name:
+            targets[name] = int(need.strip() or 1)
+    return targets
+
+
+class OptimizerDialog(tk.Toplevel):
+    def __init__(self, app: "CharmCombo"):
+        super().__init__(app)
+        self.app = app
+        self.title("Optimize charm")
+        self.geometry("640x420")
+
+        form = ttk.Frame(self, padding=10)
+        form.pack(fill=tk.X)
+        ttk.Label(form, text="Target skills (Skill:min level, ...):").pack(side=tk.LEFT)
+        self.targets_var = tk.StringVar(value="")
+        entry = ttk.Entry(form, textvariable=self.targets_var, width=40)
+        entry.pack(side=tk.LEFT, padx=6, fill=tk.X, expand=True)
+        entry.bind("<Return>", lambda e: self.run())
+
+        opts = ttk.Frame(self, padding=(10, 0))
+        opts.pack(fill=tk.X)
+        ttk.Label(opts, text="Top:").pack(side=tk.LEFT)
+        self.top_var = tk.StringVar(value="10")
+        ttk.Spinbox(opts, from_=1, to=500, textvariable=self.top_var, width=6).pack(side=tk.LEFT, padx=(4, 12))
+        self.all_rarities_var = tk.BooleanVar(value=True)
+        ttk.Checkbutton(opts, text="All rarities", variable=self.all_rarities_var).pack(side=tk.LEFT)
+        self.run_btn = ttk.Button(opts, text="Run", command=self.run)
+        self.run_btn.pack(side=tk.RIGHT)
+        # (results, error) of the search running on the background thread, once it ends
+        self._outcome: Optional[Tuple[List[Dict[str, Any]], Optional[BaseException]]] = None
+
+        self.output = tk.Text(self, height=16, state=tk.DISABLED)
+        self.output.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
+        entry.focus_set()
+
+    def run(self):
+        if str(self.run_btn["state"]) == tk.DISABLED:
+            return
+        try:
+            targets = parse_targets(self.targets_var.get())
+            top_n = int(self.top_var.get())
+        except ValueError:
+            messagebox.showerror("Optimize", "Use 'Skill:level' pairs separated by commas, and a number for Top.", parent=self)
+            return
+        known = {name for names in self.app.query.index.max_levels.values() for name in names}
+        unknown = [t for t in targets if t not in known]
+        if unknown:
+            messagebox.showerror("Optimize", f"Unknown skill(s): {', '.join(unknown)}", parent=self)
+            return
+
+        rarity = None if self.all_rarities_var.get() else self.app.selected_rarity.get()
+        # optimize only reads the index and combo lists, so it can run next to the refresh worker
+        query = self.app.query
+        self._outcome = None
+
+        def search():
+            try:
+                self._outcome = (query.optimize(targets, rarity, top_n), None)
+            except BaseException as e:
+                self._outcome = ([], e)
+
+        threading.Thread(target=search, name="optimize", daemon=True).start()
+        self.run_btn.config(state=tk.DISABLED)
+        self._show("Searching…\n")
+        self.app.after(OPTIMIZE_POLL_MS, self._poll)
+
+    def _poll(self):
+        # Polled through the app so closing the dialog mid-search just drops the result.
+        if not self.winfo_exists():
+            return
+        if self._outcome is None:
+            self.app.after(OPTIMIZE_POLL_MS, self._poll)
+            return
+        found, error = self._outcome
+        self.run_btn.config(state=tk.NORMAL)
+        if error is not None:
+            self._show(f"Search failed: {type(error).__name__}: {error}\n")
+            return
+        lines: List[str] = []
+        if not found:
+            lines.append("No combo reaches those levels.\n")
+        for idx, r in enumerate(found, start=1):
+            slots = ", ".join(f"{a} {lvl}" if a else "-" for a, lvl in zip(r["assignment"], r["levels"]))
+            totals = ", ".join(f"{name} {lvl}" for name, lvl in r["totals"].items())
+            lines.append(f"#{idx}  rarity {r['rarity']}  pattern {r['combo']}  score {r['score']}\n  slots: {slots}\n  totals: {totals}\n\n")
+        self._show("".join(lines))
+
+    def _show(self, text: str):
+        self.output.configure(state=tk.NORMAL)
+        self.output.delete("1.0", tk.END)
+        self.output.insert(tk.END, text)
+        self.output.configure(state=tk.DISABLED)
+
+
 class CharmCombo(tk.Tk):
     def __init__(self, json_path: str):
         super().__init__()
@@ -68,25 +196,178 @@ class CharmCombo(tk.Tk):
 
         self.json_path = json_path
         try:
-            self.data: Dict[str, Any] = load_json(json_path)
+            self.data: Dict[str, Any] = load_data(json_path)
         except Exception as e:
             messagebox.showerror("Load error", f"Failed to load {json_path}:\n{e}")
             raise
+        self.query = CharmQuery(self.data)
 
         self.selected_rarity = tk.StringVar(value="")
         self.global_search = tk.StringVar(value="")
+        self.slot_pattern = tk.StringVar(value="")
 
+        # Rows are created once and kept; the lists below are the visible prefix of the pool.
+        self._pool_rows: List[SlotRow] = []
+        self._pool_search: List[tk.StringVar] = []
+        self._pool_skills: List[tk.StringVar] = []
+        self._pool_levels: List[tk.StringVar] = []
         self.slot_rows: List[SlotRow] = []
         self.per_dropdown_search: List[tk.StringVar] = []
         self.selected_skills_vars: List[tk.StringVar] = []
         self.selected_levels_vars: List[tk.StringVar] = []
+        # rarity -> (dropdown searches, skills, levels) as last left by the user
+        self._rarity_selections: Dict[str, Tuple[List[str], List[str], List[str]]] = {}
+        # rarity -> last applied refresh result and tree keys/labels, for instant switching back
+        self._rarity_results: Dict[str, Dict[str, Any]] = {}
+        self._rarity_views: Dict[str, Tuple[Dict[int, str], Dict[int, str]]] = {}
 
-        self.combos_current: List[Dict[str, Any]] = []
-        self.filtered_current: List[Dict[str, Any]] = []
+        self.combos_current: List[Combo] = []
+        self.filtered_current: List[Combo] = []
         self.options_current: List[List[str]] = []
+        self.combo_keys: Dict[int, str] = {}
+        self.combo_labels: Dict[int, str] = {}
+        self.tree_page = 0
+        self._tree_iids: List[str] = []
+        self._results_rendered: Optional[str] = None
+        self.results_current: List[Dict[str, Any]] = []
+        self.results_page = 0
+        self.levels_current: List[List[str]] = []
+        self.options_key: Any = None
+        # (options_key, slot, dropdown search term) -> display options
+        self.slot_options_cache = LRUCache(1024)
+        self._slot_search_after: Dict[int, str] = {}
+        # shown ahead of the next status line after a data reload
+        self._reload_note: Optional[str] = None
+        # running export: cancel flag, rows written so far, and its outcome once the thread ends
+        self._export_cancel: Optional[threading.Event] = None
+        self._export_written = 0
+        self._export_outcome: Optional[Tuple[int, Optional[BaseException]]] = None
+
+        self.scheduler = RefreshScheduler(self, self._compute_refresh, self._apply_refresh)
+        self.protocol("WM_DELETE_WINDOW", self._on_close)
 
         self._build_layout()
         self._init_rarity_options()
+        self.reloader = DataReloader(self, json_path, CharmQuery.from_path, self._swap_query, self._reload_failed)
+
+    def _on_close(self):
+        self.reloader.close()
+        self.scheduler.close()
+        self.destroy()
+
+    def _swap_query(self, query: CharmQuery):
+        # Runs on the Tk thread once the reloader has loaded and indexed the new file.
+        self.scheduler.cancel()
+        self._save_selections()
+        self.query = query
+        self.data = query.data
+
+        rarities = set(query.rarities())
+        self._rarity_selections = {
+            r: self._valid_selection(r, sel)
+            for r, sel in self._rarity_selections.items()
+            if r in rarities or (r == ALL_RARITIES and rarities)
+        }
+        self._rarity_results.clear()
+        self._rarity_views.clear()
+        self.slot_options_cache.clear()
+        # Tree iids are "<rarity>:<position>", which may now name a different combo.
+        if self._tree_iids:
+            self.combos_tree.delete(*self._tree_iids)
+        self._tree_iids = []
+        self._results_rendered = None
+
+        previous = self.selected_rarity.get()
+        self.selected_rarity.set("")
+        self.rarity_cb["values"] = query.rarities() + ([ALL_RARITIES_LABEL] if rarities else [])
+        if previous == ALL_RARITIES and rarities:
+            self.rarity_cb.set(ALL_RARITIES_LABEL)
+        elif previous in rarities:
+            self.rarity_cb.set(previous)
+        else:
+            self.rarity_cb.set(query.rarities()[0] if rarities else "")
+        self._reload_note = f"Data reloaded from {self.reloader.path}"
+        self.status_var.set(self._reload_note)
+        if self.rarity_cb.get():
+            self.on_rarity_change()
+
+    def _export_or_cancel(self):
+        if self._export_cancel is not None:
+            self._export_cancel.set()
+            return
+        if self.options_key is None:
+            return
+        path = filedialog.asksaveasfilename(
+            parent=self, title="Export matching combos", defaultextension=".csv",
+            filetypes=[("CSV", "*.csv"), ("JSON Lines", "*.jsonl"), ("All files", "*.*")],
+        )
+        if not path:
+            return
+
+        # Export what is on screen: the combos and selection of the last applied refresh.
+        rarity, skills = self.options_key[0], list(self.options_key[1])
+        combos = self.filtered_current
+        query = self.query
+        records = iter_records(query.index, combos, skills, query.rarity_of(rarity))
+        cancel = threading.Event()
+        self._export_cancel = cancel
+        self._export_written = 0
+        self._export_outcome = None
+
+        def progress(written: int):
+            self._export_written = written
+
+        def run():
+            try:
+                written = export_to_path(path, records, format_for_path(path), len(skills),
+                                         export_skill_names(skills), progress, cancel)
+                self._export_outcome = (written, None)
+            except BaseException as e:
+                self._export_outcome = (self._export_written, e)
+
+        threading.Thread(target=run, name="export", daemon=True).start()
+        self.export_btn.config(text="Cancel Export")
+        self._poll_export(path, len(combos))
+
+    def _poll_export(self, path: str, total: int):
+        outcome = self._export_outcome
+        if outcome is None:
+            self.status_var.set(f"Exporting to {path}: {self._export_written}/{total} rows")
+            self.after(EXPORT_POLL_MS, self._poll_export, path, total)
+            return
+        written, error = outcome
+        if error is not None:
+            self.status_var.set(f"Export failed: {type(error).__name__}: {error}")
+        elif self._export_cancel.is_set():
+            self.status_var.set(f"Export cancelled after {written}/{total} rows; {path} was not written")
+        else:
+            self.status_var.set(f"Exported {written} rows to {path}")
+        self._export_cancel = None
+        self.export_btn.config(text="Export…")
+
+    def _reload_failed(self, error: BaseException):
+        self.status_var.set(f"Reload failed, keeping current data: {type(error).__name__}: {error}")
+
+    def _valid_selection(
+        self, rarity: str, selection: Tuple[List[str], List[str], List[str]]
+    ) -> Tuple[List[str], List[str], List[str]]:
+        """Drop the parts of a saved selection that the current data no longer offers."""
+        searches, skills, levels = selection
+        meta = self.query.rarity_meta(rarity)
+        combos = self.query.combos(rarity)
+        kept_skills: List[str] = []
+        kept_levels: List[str] = []
+        for i in range(meta.max_slots):
+            skill = skills[i] if i < len(skills) else ""
+            level = levels[i] if i < len(levels) else ""
+            token = NONE_TOKEN if skill == NONE_DISPLAY else skill
+            if token and token not in meta.skill_universe[i]:
+                skill = level = ""
+            if level and level not in get_levels_for_skill_in_slot(self.query.index, combos, i, token):
+                level = ""
+            kept_skills.append(skill)
+            kept_levels.append(level)
+        return searches[:meta.max_slots], kept_skills, kept_levels
 
     def _build_layout(self):
         outer = ttk.Frame(self, padding=10)
@@ -100,9 +381,19 @@ class CharmCombo(tk.Tk):
         ttk.Label(top, text="Global search:").pack(side=tk.LEFT)
         gs = ttk.Entry(top, textvariable=self.global_search, width=32)
         gs.pack(side=tk.LEFT, padx=6)
-        gs.bind("<KeyRelease>", lambda e: self._refresh_all())
+        gs.bind("<KeyRelease>", lambda e: self._refresh_all(delay_ms=SEARCH_DEBOUNCE_MS))
+        ttk.Label(top, text="Deco slots:").pack(side=tk.LEFT, padx=(10, 0))
+        sp = ttk.Entry(top, textvariable=self.slot_pattern, width=8)
+        sp.pack(side=tk.LEFT, padx=6)
+        sp.bind("<KeyRelease>", lambda e: self._refresh_all(delay_ms=SEARCH_DEBOUNCE_MS))
         reset_btn = ttk.Button(top, text="Reset Filters", command=self._reset_all_filters)
         reset_btn.pack(side=tk.LEFT, padx=(10, 0))
+        reload_btn = ttk.Button(top, text="Reload Data", command=lambda: self.reloader.reload_now())
+        reload_btn.pack(side=tk.LEFT, padx=(10, 0))
+        optimize_btn = ttk.Button(top, text="Optimize…", command=lambda: OptimizerDialog(self))
+        optimize_btn.pack(side=tk.LEFT, padx=(10, 0))
+        self.export_btn = ttk.Button(top, text="Export…", command=self._export_or_cancel)
+        self.export_btn.pack(side=tk.LEFT, padx=(10, 0))
         mid = ttk.Frame(outer)
         mid.pack(fill=tk.BOTH, expand=True, pady=(10, 0))
         left = ttk.LabelFrame(mid, text="Selectors", padding=10)
@@ -115,41 +406,127 @@ class CharmCombo(tk.Tk):
         self.combos_tree.heading("pattern", text="Rarity pattern")
         self.combos_tree.column("pattern", width=350, anchor=tk.W)
         self.combos_tree.pack(fill=tk.BOTH, expand=True)
+        pager = ttk.Frame(right)
+        pager.pack(fill=tk.X, pady=(6, 0))
+        self.prev_page_btn = ttk.Button(pager, text="◀ Prev", width=8, command=lambda: self._change_tree_page(-1))
+        self.prev_page_btn.pack(side=tk.LEFT)
+        self.page_var = tk.StringVar(value="")
+        ttk.Label(pager, textvariable=self.page_var, anchor=tk.CENTER).pack(side=tk.LEFT, fill=tk.X, expand=True)
+        self.next_page_btn = ttk.Button(pager, text="Next ▶", width=8, command=lambda: self._change_tree_page(1))
+        self.next_page_btn.pack(side=tk.RIGHT)
         bottom = ttk.LabelFrame(outer, text="Aggregated result (when fully selected)", padding=10)
         bottom.pack(fill=tk.BOTH, expand=True, pady=(10, 0))
         self.results_text = tk.Text(bottom, height=10, state=tk.DISABLED)
         self.results_text.pack(fill=tk.BOTH, expand=True)
+        results_pager = ttk.Frame(bottom)
+        results_pager.pack(fill=tk.X, pady=(6, 0))
+        self.prev_results_btn = ttk.Button(results_pager, text="◀ Prev", width=8,
+                                           command=lambda: self._change_results_page(-1))
+        self.prev_results_btn.pack(side=tk.LEFT)
+        self.results_page_var = tk.StringVar(value="")
+        ttk.Label(results_pager, textvariable=self.results_page_var, anchor=tk.CENTER).pack(
+            side=tk.LEFT, fill=tk.X, expand=True)
+        self.next_results_btn = ttk.Button(results_pager, text="Next ▶", width=8,
+                                           command=lambda: self._change_results_page(1))
+        self.next_results_btn.pack(side=tk.RIGHT)
         self.status_var = tk.StringVar(value="Ready")
         status = ttk.Label(outer, textvariable=self.status_var, anchor=tk.W)
         status.pack(fill=tk.X, pady=(6, 0))
 
     def _init_rarity_options(self):
-        rarity_keys = sorted(self.data.get("rarity", {}).keys(), key=lambda x: int(x))
-        self.rarity_cb["values"] = rarity_keys
+        rarity_keys = self.query.rarities()
+        self.rarity_cb["values"] = rarity_keys + ([ALL_RARITIES_LABEL] if rarity_keys else [])
         if rarity_keys:
             self.rarity_cb.set(rarity_keys[0])
             self.on_rarity_change()
 
     def _reset_all_filters(self):
         self.global_search.set("")
+        self.slot_pattern.set("")
         for v in self.per_dropdown_search: v.set("")
         for v in self.selected_skills_vars: v.set("")
         for v in self.selected_levels_vars: v.set("")
         self._refresh_all()
         
+    def _save_selections(self):
+        previous = self.selected_rarity.get()
+        if previous:
+            self._rarity_selections[previous] = (
+                [v.get() for v in self.per_dropdown_search],
+                [v.get() for v in self.selected_skills_vars],
+                [v.get() for v in self.selected_levels_vars],
+            )
+
     def on_rarity_change(self, event=None):
-        self.selected_rarity.set(self.rarity_cb.get())
-        self.combos_current = combos_for_rarity(self.data, self.selected_rarity.get())
-        max_slots = compute_max_slots(self.combos_current)
-        for row_widget in self.slot_rows:
-            row_widget.destroy()
-        self.slot_rows = []
-        self.per_dropdown_search = []
-        self.selected_skills_vars = []
-        self.selected_levels_vars = []
-        for i in range(max_slots):
-            self._add_slot_row(i)
-        self._refresh_all()
+        # Whatever is pending or in flight was computed for the rarity being left.
+        self.scheduler.cancel()
+        self._save_selections()
+
+        choice = self.rarity_cb.get()
+        self.selected_rarity.set(ALL_RARITIES if choice == ALL_RARITIES_LABEL else choice)
+        rarity = self.selected_rarity.get()
+        self.combos_current = self.query.combos(rarity)
+        if rarity not in self._rarity_views:
+            keys = {id(c): f"{rarity}:{i}" for i, c in enumerate(self.combos_current)}
+            if rarity == ALL_RARITIES:
+                labels = {
+                    id(c): f"rarity {r}: {list(c.combination)}"
+                    for r in self.query.rarities() for c in self.query.combos(r)
+                }
+            else:
+                labels = {id(c): str(list(c.combination)) for c in self.combos_current}
+            self._rarity_views[rarity] = (keys, labels)
+        self.combo_keys, self.combo_labels = self._rarity_views[rarity]
+        self.tree_page = 0
+
+        max_slots = self.query.slot_count(rarity)
+        self._show_slot_rows(max_slots)
+        searches, skills, levels = self._rarity_selections.get(rarity, ([], [], []))
+        for values, variables in ((searches, self.per_dropdown_search), (skills, self.selected_skills_vars),
+                                  (levels, self.selected_levels_vars)):
+            for i, var in enumerate(variables):
+                var.set(values[i] if i < len(values) else "")
+
+        cached = self._rarity_results.get(rarity)
+        if cached is not None and cached["key"] == self._selection_key():
+            self._apply_refresh(cached)
+        else:
+            self._refresh_all()
+
+    def _show_slot_rows(self, count: int):
+        while len(self._pool_rows) < count:
+            self._add_slot_row(len(self._pool_rows))
+        # The visible rows are always a prefix of the pool, so packing in index
+        # order keeps them in order on screen.
+        for i, row in enumerate(self._pool_rows):
+            if i < count:
+                if not row.winfo_manager():
+                    row.pack(fill=tk.X, pady=4)
+            elif row.winfo_manager():
+                row.pack_forget()
+        self.slot_rows = self._pool_rows[:count]
+        self.per_dropdown_search = self._pool_search[:count]
+        self.selected_skills_vars = self._pool_skills[:count]
+        self.selected_levels_vars = self._pool_levels[:count]
+
+    def _selection_key(self) -> Tuple[Any, ...]:
+        positions = len(self.selected_skills_vars)
+        return selection_key(
+            self.selected_rarity.get(),
+            normalize_selection([v.get() for v in self.selected_skills_vars], positions),
+            normalize_selection([v.get() for v in self.selected_levels_vars], positions),
+            self.global_search.get(),
+            self._slot_pattern_text(),
+        )
+
+    def _slot_pattern_text(self) -> str:
+        # A half-typed pattern ("W") is ignored rather than reported.
+        text = self.slot_pattern.get()
+        try:
+            parse_slot_pattern(text)
+        except ValueError:
+            return ""
+        return text
 
     def on_skill_select(self, event, changed_index: int):
         self.selected_levels_vars[changed_index].set("")
@@ -165,34 +542,67 @@ class CharmCombo(tk.Tk):
         search_var = tk.StringVar(value="")
         skill_var = tk.StringVar(value="")
         level_var = tk.StringVar(value="")
-        self.per_dropdown_search.append(search_var)
-        self.selected_skills_vars.append(skill_var)
-        self.selected_levels_vars.append(level_var)
+        self._pool_search.append(search_var)
+        self._pool_skills.append(skill_var)
+        self._pool_levels.append(level_var)
 
         row = SlotRow(
             self.slots_container, idx,
             search_var=search_var, skill_var=skill_var, level_var=level_var,
-            on_search_update=lambda e, i=idx: self._update_slot_options(i),
+            on_search_update=lambda e, i=idx: self._schedule_slot_options(i),
             on_skill_select=lambda e, i=idx: self.on_skill_select(e, i),
             on_level_select=self.on_level_select,
             on_combo_open=lambda i=idx: self._update_slot_options(i)
         )
-        row.pack(fill=tk.X, pady=4)
-        self.slot_rows.append(row)
+        self._pool_rows.append(row)
 
-    def _refresh_all(self):
+    def _refresh_all(self, delay_ms: int = 0):
         selected_skills = [v.get() if v.get() else None for v in self.selected_skills_vars]
         selected_levels = [v.get() if v.get() else None for v in self.selected_levels_vars]
-        gsearch = self.global_search.get()
-        
-        internal_selections = [NONE_TOKEN if s == "— none —" else s for s in selected_skills]
-        
-        self.filtered_current = filter_combos(self.data, self.combos_current, internal_selections, selected_levels, gsearch)
-        self.options_current = options_per_position(self.data, self.filtered_current, len(self.selected_skills_vars))
-        
-        for i, row in enumerate(self.slot_rows):
-            initial_rarity_lbl = rarity_label_for_position(self.combos_current, i)
-            row.set_rarity_label(initial_rarity_lbl)
+        snapshot = {
+            "rarity": self.selected_rarity.get(),
+            "skills": selected_skills,
+            "levels": selected_levels,
+            "search": self.global_search.get(),
+            "slots": self._slot_pattern_text(),
+        }
+        self.scheduler.request(snapshot, delay_ms)
+
+    def _compute_refresh(self, snap: Dict[str, Any]) -> Dict[str, Any]:
+        # Runs on the scheduler's worker thread: must not touch any widget or Tk variable.
+        res = self.query.run(snap["rarity"], snap["skills"], snap["levels"], snap["search"], snap["slots"])
+        positions = len(res["options"])
+        key = selection_key(
+            snap["rarity"],
+            normalize_selection(snap["skills"], positions),
+            normalize_selection(snap["levels"], positions),
+            snap["search"],
+            snap["slots"],
+        )
+        return {
+            "rarity": snap["rarity"],
+            "key": key,
+            "filtered": res["combos"],
+            "options": res["options"],
+            "levels": res["levels"],
+            "labels": res["labels"],
+            # only the first page is rendered here; other pages on demand
+            "results": res["results"],
+            "results_text": format_results(res["results"]),
+            "by_rarity": {r: g["count"] for r, g in res["by_rarity"].items()} if "by_rarity" in res else None,
+        }
+
+    def _apply_refresh(self, result: Dict[str, Any]):
+        self._rarity_results[result["rarity"]] = result
+        if result["rarity"] != self.selected_rarity.get():
+            return
+        self.filtered_current = result["filtered"]
+        self.options_current = result["options"]
+        self.levels_current = result["levels"]
+        self.options_key = result["key"]
+
+        for i, row in enumerate(self.slot_rows[:len(self.options_current)]):
+            row.set_rarity_label(result["labels"][i])
             self._update_slot_options(i)
             if self.selected_skills_vars[i].get():
                 self._update_level_options_for_slot(i)
@@ -200,51 +610,105 @@ class CharmCombo(tk.Tk):
                 row.set_level_options([])
 
         self._refresh_combos_tree()
-        self._refresh_results(selected_skills)
-        self.status_var.set(f"{len(self.filtered_current)} combos match current filters")
+        self.results_current = result["results"]
+        self.results_page = 0
+        self._refresh_results(result["results_text"])
+        self._update_results_pager()
+        status = f"{len(self.filtered_current)} combos match current filters"
+        if result["by_rarity"] is not None:
+            status += " (" + ", ".join(f"rarity {r}: {n}" for r, n in result["by_rarity"].items()) + ")"
+        if self._reload_note:
+            status = f"{self._reload_note}. {status}"
+            self._reload_note = None
+        self.status_var.set(status)
+
+    def _schedule_slot_options(self, idx: int):
+        pending = self._slot_search_after.pop(idx, None)
+        if pending is not None:
+            self.after_cancel(pending)
+        self._slot_search_after[idx] = self.after(SEARCH_DEBOUNCE_MS, self._run_slot_options, idx)
+
+    def _run_slot_options(self, idx: int):
+        self._slot_search_after.pop(idx, None)
+        self._update_slot_options(idx)
 
     def _update_slot_options(self, idx: int):
         if idx >= len(self.options_current) or idx >= len(self.slot_rows): return
-        options = list(self.options_current[idx])
         term = (self.per_dropdown_search[idx].get() or "").strip().lower()
-        if term:
-            options = [o for o in options if (o == NONE_TOKEN and ("none".startswith(term) or term in "none")) or (term in o.lower())]
-        display_opts = ["— none —" if o == NONE_TOKEN else o for o in options]
+
+        def display_options() -> List[str]:
+            options = self.options_current[idx]
+            if term:
+                options = [o for o in options if (o == NONE_TOKEN and ("none".startswith(term) or term in "none")) or (term in o.lower())]
+            return [NONE_DISPLAY if o == NONE_TOKEN else o for o in options]
+
+        display_opts = self.slot_options_cache.get_or_compute((self.options_key, idx, term), display_options)
         self.slot_rows[idx].set_skill_options(display_opts)
 
     def _update_level_options_for_slot(self, idx: int):
         row = self.slot_rows[idx]
         selected_skill = self.selected_skills_vars[idx].get()
         
-        internal_skill = NONE_TOKEN if selected_skill == "— none —" else selected_skill
-        
-        if not internal_skill:
+        if not selected_skill or idx >= len(self.levels_current):
             row.set_level_options([])
             return
 
-        levels = get_levels_for_skill_in_slot(self.data, self.filtered_current, idx, internal_skill)
-        row.set_level_options(levels)
+        row.set_level_options(self.levels_current[idx])
+
+    def _change_tree_page(self, step: int):
+        self.tree_page += step
+        self._refresh_combos_tree()
 
     def _refresh_combos_tree(self):
-        self.combos_tree.delete(*self.combos_tree.get_children())
-        for c in self.filtered_current:
-            self.combos_tree.insert("", tk.END, values=(str(c.get("combination", [])),))
+        total = len(self.filtered_current)
+        pages = max(1, -(-total // TREE_PAGE_SIZE))
+        self.tree_page = min(max(self.tree_page, 0), pages - 1)
+        start = self.tree_page * TREE_PAGE_SIZE
+        page = self.filtered_current[start:start + TREE_PAGE_SIZE]
+
+        new_iids = [self.combo_keys.get(id(c)) or str(id(c)) for c in page]
+        if new_iids != self._tree_iids:
+            # Both lists follow combos_current order, so once the rows that left are
+            # deleted, inserting the newcomers at their page position keeps the order.
+            keep = set(new_iids)
+            gone = [iid for iid in self._tree_iids if iid not in keep]
+            if gone:
+                self.combos_tree.delete(*gone)
+            shown = set(self._tree_iids)
+            for pos, (iid, c) in enumerate(zip(new_iids, page)):
+                if iid not in shown:
+                    self.combos_tree.insert("", pos, iid=iid, values=(self.combo_labels.get(id(c)) or str(list(c.combination)),))
+            self._tree_iids = new_iids
+
+        if total > TREE_PAGE_SIZE:
+            self.page_var.set(f"Rows {start + 1}–{start + len(page)} of {total}")
+        else:
+            self.page_var.set("")
+        self.prev_page_btn.config(state=tk.NORMAL if self.tree_page > 0 else tk.DISABLED)
+        self.next_page_btn.config(state=tk.NORMAL if self.tree_page < pages - 1 else tk.DISABLED)
 
-    def _refresh_results(self, selected_skills: List[Any]):
+    def _change_results_page(self, step: int):
+        pages = max(1, -(-len(self.results_current) // RESULTS_PAGE_SIZE))
+        self.results_page = min(max(self.results_page + step, 0), pages - 1)
+        self._refresh_results(format_results(self.results_current, self.results_page * RESULTS_PAGE_SIZE))
+        self._update_results_pager()
+
+    def _update_results_pager(self):
+        total = len(self.results_current)
+        pages = max(1, -(-total // RESULTS_PAGE_SIZE))
+        start = self.results_page * RESULTS_PAGE_SIZE
+        if total > RESULTS_PAGE_SIZE:
+            self.results_page_var.set(f"Results {start + 1}–{min(start + RESULTS_PAGE_SIZE, total)} of {total}")
+        else:
+            self.results_page_var.set("")
+        self.prev_results_btn.config(state=tk.NORMAL if self.results_page > 0 else tk.DISABLED)
+        self.next_results_btn.config(state=tk.NORMAL if self.results_page < pages - 1 else tk.DISABLED)
+
+    def _refresh_results(self, text: str):
+        if text == self._results_rendered:
+            return
         self.results_text.configure(state=tk.NORMAL)
         self.results_text.delete("1.0", tk.END)
-        internal_selections = [NONE_TOKEN if s == "— none —" else s for s in selected_skills]
-        res = aggregated_results(self.data, self.filtered_current, internal_selections)
-        if not res:
-            self.results_text.insert(tk.END, "Select every non-empty slot to compute aggregated skill levels.\n")
-        else:
-            for idx, r in enumerate(res, start=1):
-                self.results_text.insert(tk.END, f"Result #{idx}\n  Pattern: {r['combo']}\n")
-                totals = r.get("totals", {})
-                if not totals:
-                    self.results_text.insert(tk.END, "  (no skills)\n\n")
-                else:
-                    for name, lvl in sorted(totals.items()):
-                        self.results_text.insert(tk.END, f"  {name}: level {lvl}\n")
-                    self.results_text.insert(tk.END, "\n")
-        self.results_text.configure(state=tk.DISABLED)
\ No newline at end of file
+        self.results_text.insert(tk.END, text)
+        self.results_text.configure(state=tk.DISABLED)
+        self._results_rendered = text